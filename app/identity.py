@@ -0,0 +1,55 @@
+"""
+Identity of the process serving a request, resolved once at startup.
+- cluster: CLUSTER_NAME, exported by the user_data scripts.
+- instance: INSTANCE_ID if set (serve.py resolves it once for all
+  workers), else the EC2 instance metadata service (IMDSv2), else the
+  hostname when running off EC2.
+- pid: the uvicorn worker.
+Sent on every response as one precomputed header, e.g.
+`X-Backend: cluster1/i-0abc123/4242`.
+"""
+
+import os
+import socket
+import urllib.request
+
+BACKEND_HEADER = "X-Backend"
+IMDS_URL = "http://169.254.169.254/latest"
+IMDS_TIMEOUT = 0.5
+
+
+def instance_id_from_imds(timeout=IMDS_TIMEOUT):
+    """EC2 instance ID from IMDSv2, or None when not on EC2"""
+    try:
+        token_request = urllib.request.Request(
+            f"{IMDS_URL}/api/token", method="PUT",
+            headers={"X-aws-ec2-metadata-token-ttl-seconds": "60"},
+        )
+        with urllib.request.urlopen(token_request, timeout=timeout) as response:
+            token = response.read().decode()
+        id_request = urllib.request.Request(
+            f"{IMDS_URL}/meta-data/instance-id", headers={"X-aws-ec2-metadata-token": token},
+        )
+        with urllib.request.urlopen(id_request, timeout=timeout) as response:
+            return response.read().decode()
+    except OSError:
+        return None
+
+
+def resolve_instance_id():
+    return os.environ.get("INSTANCE_ID") or instance_id_from_imds() or socket.gethostname()
+
+
+class Identity:
+    def __init__(self, cluster=None, instance_id=None, pid=None):
+        self.cluster = cluster or os.environ.get("CLUSTER_NAME", "unknown")
+        self.instance_id = instance_id or resolve_instance_id()
+        self.pid = pid or os.getpid()
+
+    @property
+    def backend(self):
+        return f"{self.cluster}/{self.instance_id}/{self.pid}"
+
+    @property
+    def headers(self):
+        return {BACKEND_HEADER: self.backend}
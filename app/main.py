@@ -1,31 +1,68 @@
-from fastapi import FastAPI
-import uvicorn
-import logging
+import asyncio
+from contextlib import asynccontextmanager
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
-logger = logging.getLogger(__name__)
+from fastapi import FastAPI, Request
+from fastapi.responses import PlainTextResponse
+
+from identity import Identity
+from request_log import RequestLogMiddleware, configure_logging
+from responses import StaticPayload
+from server_metrics import MetricsMiddleware, WorkerMetrics, render_prometheus, worker_count
+from work import PREFIXES as WORK_PREFIXES, create_router as create_work_router, shutdown_pool
+
+# Configure logging: JSON lines written by a background thread, see request_log.py
+log_listener = configure_logging()
+# Per-worker request counters and latency histograms, see server_metrics.py
+metrics = WorkerMetrics()
+
+@asynccontextmanager
+async def lifespan(app):
+    snapshots = asyncio.create_task(metrics.run_snapshots())
+    yield
+    snapshots.cancel()
+    shutdown_pool()
+    metrics.write_snapshot()
+    log_listener.stop()
 
 # Create FastAPI app
-app = FastAPI()
-
-@app.get("/")
-async def root():
-    message = "Instance has received the request"
-    logger.info(message)
-    return {"message": message}
-
-@app.get("/cluster1")
-async def cluster1():
-    message = "Request received by cluster1 instance"
-    logger.info(message)
-    return {"status": "ok", "host": "cluster1", "message": message}
-
-@app.get("/cluster2")
-async def cluster2():
-    message = "Request received by cluster2 instance"
-    logger.info(message)
-    return {"status": "ok", "host": "cluster2", "message": message}
+app = FastAPI(lifespan=lifespan)
+app.add_middleware(RequestLogMiddleware)
+app.add_middleware(MetricsMiddleware, metrics=metrics)
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def prometheus_metrics():
+    return render_prometheus(metrics.aggregate(), worker_count(metrics.directory))
+
+# Who is serving, resolved once per worker and sent as a response header (see identity.py)
+IDENTITY = Identity()
+CLUSTER_PAYLOAD = {
+    "status": "ok",
+    "host": IDENTITY.cluster,
+    "message": f"Request received by {IDENTITY.cluster} instance",
+}
+
+# path -> constant payload, the same table on every instance; the ALB decides
+# which cluster serves each path
+ROUTES = {
+    "/": {"message": "Instance has received the request"},
+    "/cluster1": CLUSTER_PAYLOAD,
+    "/cluster2": CLUSTER_PAYLOAD,
+}
+
+def static_handler(payload):
+    async def handler(request: Request):
+        return payload.respond(request)
+    return handler
+
+# Payloads are serialized once with their headers (see responses.py)
+for path, content in ROUTES.items():
+    app.add_api_route(path, static_handler(StaticPayload(content, extra_headers=IDENTITY.headers)),
+                      methods=["GET"])
+
+# Synthetic CPU / IO / payload endpoints (see work.py)
+for prefix in WORK_PREFIXES:
+    app.include_router(create_work_router(prefix, IDENTITY.headers))
 
 if __name__ == "__main__":
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    from serve import run
+    run()
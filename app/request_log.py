@@ -0,0 +1,185 @@
+"""
+Non-blocking, batched request logging.
+- Handlers on the event loop only put records on a queue (QueueHandler);
+  a QueueListener thread formats them as JSON lines and writes them in
+  batches, flushing every `batch_size` records or `flush_interval` seconds.
+- Request logs can be sampled (1 of N); warnings and errors always pass.
+- RequestLogMiddleware is a plain ASGI middleware that logs method, path,
+  status and latency once per request.
+
+Environment: LOG_REQUESTS (1/0), LOG_SAMPLE (N), LOG_FILE (default stderr),
+LOG_BATCH_SIZE, LOG_FLUSH_INTERVAL.
+"""
+
+import atexit
+import itertools
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import time
+
+REQUEST_LOGGER = "app.requests"
+RECORD_FIELDS = ("method", "path", "status", "latency_ms")
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record, including request fields passed as `extra`"""
+
+    def format(self, record):
+        entry = {
+            "ts": round(record.created, 6),
+            "level": record.levelname,
+            "logger": record.name,
+            "pid": record.process,
+            "message": record.getMessage(),
+        }
+        for name in RECORD_FIELDS:
+            value = getattr(record, name, None)
+            if value is not None:
+                entry[name] = value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, separators=(",", ":"))
+
+
+class SampleFilter(logging.Filter):
+    """Keep 1 of every `n` records below WARNING"""
+
+    def __init__(self, n=1):
+        super().__init__()
+        self.n = max(1, n)
+        self._counter = itertools.count()
+
+    def filter(self, record):
+        return record.levelno >= logging.WARNING or next(self._counter) % self.n == 0
+
+
+class BatchStreamHandler(logging.Handler):
+    """Buffers formatted lines and writes them with one write + flush per batch"""
+
+    def __init__(self, stream, batch_size=256, flush_interval=0.5):
+        super().__init__()
+        self.stream = stream
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._buffer = []
+        self._last_flush = time.monotonic()
+
+    def emit(self, record):
+        try:
+            self._buffer.append(self.format(record))
+        except Exception:
+            self.handleError(record)
+            return
+        if len(self._buffer) >= self.batch_size or time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        if self._buffer:
+            self.stream.write("\n".join(self._buffer) + "\n")
+            self.stream.flush()
+            self._buffer.clear()
+        self._last_flush = time.monotonic()
+
+    def close(self):
+        self.flush()
+        super().close()
+
+
+class BatchQueueListener(logging.handlers.QueueListener):
+    """QueueListener that also flushes its handlers whenever the queue is idle"""
+
+    def __init__(self, log_queue, *handlers, flush_interval=0.5):
+        super().__init__(log_queue, *handlers, respect_handler_level=True)
+        self.flush_interval = flush_interval
+
+    def stop(self):
+        """Drain the queue and flush; safe to call more than once"""
+        if self._thread is not None:
+            super().stop()
+        for handler in self.handlers:
+            handler.flush()
+
+    def dequeue(self, block):
+        while True:
+            try:
+                return self.queue.get(block, timeout=self.flush_interval)
+            except queue.Empty:
+                if not block:
+                    raise
+                for handler in self.handlers:
+                    handler.flush()
+
+
+def env_flag(name, default):
+    return os.environ.get(name, default).lower() not in ("0", "false", "off", "no", "")
+
+
+def configure_logging(enabled=None, sample=None, path=None, batch_size=None, flush_interval=None):
+    """
+    Route the root logger through a queue to a batched JSON writer.
+    Returns the started listener; stop it on shutdown to flush the last batch
+    (uvicorn re-raises SIGTERM after a graceful shutdown, so atexit may not run).
+    """
+    enabled = env_flag("LOG_REQUESTS", "1") if enabled is None else enabled
+    sample = int(os.environ.get("LOG_SAMPLE", 1)) if sample is None else sample
+    path = os.environ.get("LOG_FILE") if path is None else path
+    batch_size = int(os.environ.get("LOG_BATCH_SIZE", 256)) if batch_size is None else batch_size
+    flush_interval = float(os.environ.get("LOG_FLUSH_INTERVAL", 0.5)) if flush_interval is None else flush_interval
+
+    root = logging.getLogger()
+    root.handlers.clear()
+    root.setLevel(logging.INFO)
+    # Only the per-request records are sampled; startup, uvicorn and error logs are kept
+    request_logger = logging.getLogger(REQUEST_LOGGER)
+    request_logger.disabled = not enabled
+    request_logger.filters.clear()
+    request_logger.addFilter(SampleFilter(sample))
+
+    stream = open(path, "a", buffering=1 << 16) if path else sys.stderr
+    writer = BatchStreamHandler(stream, batch_size, flush_interval)
+    writer.setFormatter(JsonFormatter())
+
+    log_queue = queue.SimpleQueue()
+    queue_handler = logging.handlers.QueueHandler(log_queue)
+    root.addHandler(queue_handler)
+
+    listener = BatchQueueListener(log_queue, writer, flush_interval=flush_interval)
+    listener.start()
+    atexit.register(listener.stop)
+    return listener
+
+
+class RequestLogMiddleware:
+    """ASGI middleware logging method, path, status and latency of each request"""
+
+    def __init__(self, app):
+        self.app = app
+        self.logger = logging.getLogger(REQUEST_LOGGER)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or self.logger.disabled:
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            self.logger.info("request", extra={
+                "method": scope["method"],
+                "path": scope["path"],
+                "status": status,
+                "latency_ms": round((time.perf_counter() - start) * 1000, 3),
+            })
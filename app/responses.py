@@ -0,0 +1,68 @@
+"""
+Precomputed responses for static payloads.
+- Payloads are serialized once at startup (orjson when installed, compact
+  json otherwise) together with their headers: Content-Type,
+  Content-Length, ETag and Cache-Control.
+- Handlers return a shallow copy of the prebuilt Response, with its own
+  header list, so FastAPI does no validation or serialization per request
+  and header changes on one response never reach the next.
+- A matching If-None-Match gets a prebuilt empty 304.
+"""
+
+import copy
+import hashlib
+import json
+
+from starlette.responses import Response
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+CACHE_CONTROL = "public, max-age=60"
+
+
+def dumps(content):
+    """JSON bytes of a payload"""
+    if orjson is not None:
+        return orjson.dumps(content)
+    return json.dumps(content, separators=(",", ":"), ensure_ascii=False).encode()
+
+
+class PrecomputedResponse(Response):
+    """Response whose body and raw headers are built once; each request gets a copy()"""
+
+    def copy(self):
+        """Shallow copy: the body is shared, the header list is not"""
+        response = copy.copy(self)
+        response.raw_headers = list(self.raw_headers)
+        response.__dict__.pop("_headers", None)   # MutableHeaders view of the original list
+        return response
+
+
+def etag_matches(if_none_match, etag):
+    """If-None-Match check (weak comparison, as RFC 9110 requires for 304s)"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(tag.strip().removeprefix("W/") == etag for tag in if_none_match.split(","))
+
+
+class StaticPayload:
+    """A constant JSON payload served as prebuilt 200 / 304 responses"""
+
+    def __init__(self, content, cache_control=CACHE_CONTROL, extra_headers=None):
+        self.content = content
+        self.body = dumps(content)
+        self.etag = f'"{hashlib.blake2b(self.body, digest_size=8).hexdigest()}"'
+        headers = {"etag": self.etag, "cache-control": cache_control, **(extra_headers or {})}
+        # Content-Length and Content-Type are added by Response (neither on the 304)
+        self.ok = PrecomputedResponse(self.body, 200, headers, media_type="application/json")
+        self.not_modified = PrecomputedResponse(b"", 304, headers)
+
+    def respond(self, request):
+        if etag_matches(request.headers.get("if-none-match"), self.etag):
+            return self.not_modified.copy()
+        return self.ok.copy()
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Production launcher for the FastAPI app.
+- One uvicorn worker process per CPU by default, so every vCPU serves
+  requests (a single worker leaves the t2.large's second vCPU idle).
+- uvloop and httptools when they are installed, the stdlib loop and h11
+  otherwise.
+- Keep-alive longer than the ALB idle timeout (60 s), so the server never
+  closes a connection the ALB is about to reuse (which shows up as 502s).
+- Configurable listen backlog; access logs off.
+- The instance ID is looked up once and passed to the workers (INSTANCE_ID),
+  which add it to every response (see identity.py).
+- A fresh METRICS_DIR per launch, where workers share their /metrics
+  snapshots (see server_metrics.py).
+
+    python3 serve.py                   # auto-sized
+    python3 serve.py --workers 1       # or WEB_WORKERS=1
+"""
+
+import argparse
+import glob
+import importlib.util
+import os
+import tempfile
+
+import uvicorn
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+
+ALB_IDLE_TIMEOUT = 60
+KEEP_ALIVE_TIMEOUT = ALB_IDLE_TIMEOUT + 5
+BACKLOG = 2048
+
+
+def default_workers():
+    """Workers the server may use: the CPUs this process is allowed to run on"""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def has_module(name):
+    return importlib.util.find_spec(name) is not None
+
+
+def server_options(workers=None, host="0.0.0.0", port=8000, keep_alive=KEEP_ALIVE_TIMEOUT,
+                   backlog=BACKLOG, access_log=False):
+    """Keyword arguments for uvicorn.run"""
+    return {
+        "host": host,
+        "port": port,
+        "workers": workers or default_workers(),
+        "loop": "uvloop" if has_module("uvloop") else "asyncio",
+        "http": "httptools" if has_module("httptools") else "h11",
+        "timeout_keep_alive": keep_alive,
+        "backlog": backlog,
+        "access_log": access_log,
+        "app_dir": APP_DIR,
+    }
+
+
+def reset_metrics_dir(port):
+    """Point every worker at the same metrics directory, without stale snapshots"""
+    directory = os.environ.setdefault("METRICS_DIR", os.path.join(tempfile.gettempdir(), f"app-metrics-{port}"))
+    os.makedirs(directory, exist_ok=True)
+    for path in glob.glob(os.path.join(directory, "worker-*.json")):
+        os.remove(path)
+    return directory
+
+
+def run(**kwargs):
+    options = server_options(**kwargs)
+    reset_metrics_dir(options["port"])
+    # Each worker has its own CPU pool for /work/cpu: share the CPUs between them
+    os.environ.setdefault("CPU_POOL_SIZE", str(max(1, default_workers() // options["workers"])))
+    # Resolve the instance ID once here instead of in every worker
+    from identity import resolve_instance_id
+    os.environ.setdefault("INSTANCE_ID", resolve_instance_id())
+    print(
+        f"🚀 Serving main:app on {options['host']}:{options['port']} with {options['workers']} worker(s), "
+        f"loop={options['loop']}, http={options['http']}, keep-alive={options['timeout_keep_alive']}s, "
+        f"backlog={options['backlog']}",
+        flush=True,
+    )
+    uvicorn.run("main:app", **options)
+
+
+def parse_args(argv=None):
+    env = os.environ
+    parser = argparse.ArgumentParser(description="Run the FastAPI app with production settings")
+    parser.add_argument("--host", default=env.get("HOST", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=int(env.get("PORT", 8000)))
+    parser.add_argument("--workers", type=int, default=int(env.get("WEB_WORKERS", 0)),
+                        help="Worker processes (default: one per CPU)")
+    parser.add_argument("--keep-alive", type=int, default=int(env.get("KEEP_ALIVE_TIMEOUT", KEEP_ALIVE_TIMEOUT)),
+                        help=f"Keep-alive timeout in seconds (default: {KEEP_ALIVE_TIMEOUT}, above the ALB's 60 s)")
+    parser.add_argument("--backlog", type=int, default=int(env.get("BACKLOG", BACKLOG)),
+                        help=f"Listen backlog (default: {BACKLOG})")
+    parser.add_argument("--access-log", action="store_true", help="Enable uvicorn access logs")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    run(workers=args.workers, host=args.host, port=args.port, keep_alive=args.keep_alive,
+        backlog=args.backlog, access_log=args.access_log)
@@ -0,0 +1,192 @@
+"""
+In-process request metrics, exposed in Prometheus text format.
+- MetricsMiddleware counts requests per (route, status) and records latency
+  in a fixed-bucket histogram per route. Each uvicorn worker runs a single
+  event loop, so the counters are plain dicts and lists with no locks.
+- Workers share their counters through snapshot files in METRICS_DIR
+  (one JSON file per pid, rewritten every second and on each scrape);
+  /metrics sums every snapshot so any worker answers for the whole server.
+  Snapshots of pids that are no longer alive (an earlier run, a crashed
+  worker) are skipped; serve.py also clears the directory at startup.
+"""
+
+import asyncio
+import glob
+import json
+import os
+import tempfile
+import time
+from bisect import bisect_left
+
+METRICS_DIR = os.environ.get("METRICS_DIR") or os.path.join(tempfile.gettempdir(), "app-metrics")
+SNAPSHOT_INTERVAL = 1.0
+EXCLUDED_PATHS = {"/metrics"}
+
+# Latency bucket upper bounds in seconds: 50 µs to ~30 s, growing by 25%
+BUCKETS = tuple(round(50e-6 * 1.25 ** i, 6) for i in range(60))
+
+
+def pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def live_snapshots(directory=METRICS_DIR):
+    """Snapshot files of worker processes that are still running"""
+    paths = []
+    for path in glob.glob(os.path.join(directory, "worker-*.json")):
+        pid = os.path.basename(path)[len("worker-"):-len(".json")]
+        if pid.isdigit() and pid_alive(int(pid)):
+            paths.append(path)
+    return paths
+
+
+class RouteMetrics:
+    """Counters of one route in one worker"""
+
+    __slots__ = ("statuses", "buckets", "sum", "count")
+
+    def __init__(self):
+        self.statuses = {}
+        self.buckets = [0] * (len(BUCKETS) + 1)   # last one is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def record(self, status, seconds):
+        self.statuses[status] = self.statuses.get(status, 0) + 1
+        self.buckets[bisect_left(BUCKETS, seconds)] += 1
+        self.sum += seconds
+        self.count += 1
+
+    def to_dict(self):
+        return {"statuses": self.statuses, "buckets": self.buckets, "sum": self.sum, "count": self.count}
+
+
+class WorkerMetrics:
+    """Per-worker registry of RouteMetrics, persisted as a snapshot file"""
+
+    def __init__(self, directory=METRICS_DIR):
+        self.directory = directory
+        self.routes = {}
+        self.path = os.path.join(directory, f"worker-{os.getpid()}.json")
+        self._written = None
+
+    def record(self, route, status, seconds):
+        metrics = self.routes.get(route)
+        if metrics is None:
+            metrics = self.routes[route] = RouteMetrics()
+        metrics.record(status, seconds)
+
+    def total(self):
+        return sum(m.count for m in self.routes.values())
+
+    def write_snapshot(self):
+        """Write this worker's counters if they changed since the last write"""
+        total = self.total()
+        if total == self._written:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        snapshot = {route: m.to_dict() for route, m in self.routes.items()}
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(snapshot, f)
+        os.replace(tmp_path, self.path)
+        self._written = total
+
+    async def run_snapshots(self, interval=SNAPSHOT_INTERVAL):
+        """Background task writing the snapshot every `interval` seconds"""
+        while True:
+            await asyncio.sleep(interval)
+            self.write_snapshot()
+
+    def aggregate(self):
+        """Counters summed over every worker's snapshot (this one refreshed first)"""
+        self.write_snapshot()
+        totals = {}
+        for path in live_snapshots(self.directory):
+            try:
+                with open(path) as f:
+                    snapshot = json.load(f)
+            except (OSError, ValueError):
+                continue
+            for route, data in snapshot.items():
+                agg = totals.setdefault(route, {"statuses": {}, "buckets": [0] * (len(BUCKETS) + 1),
+                                                "sum": 0.0, "count": 0})
+                for status, count in data["statuses"].items():
+                    agg["statuses"][status] = agg["statuses"].get(status, 0) + count
+                agg["buckets"] = [a + b for a, b in zip(agg["buckets"], data["buckets"])]
+                agg["sum"] += data["sum"]
+                agg["count"] += data["count"]
+        return totals
+
+
+def render_prometheus(totals, workers=None):
+    """Prometheus text exposition of aggregated counters"""
+    lines = [
+        "# HELP app_requests_total Requests by route and status code.",
+        "# TYPE app_requests_total counter",
+    ]
+    for route, data in sorted(totals.items()):
+        for status, count in sorted(data["statuses"].items()):
+            lines.append(f'app_requests_total{{route="{route}",status="{status}"}} {count}')
+
+    lines += [
+        "# HELP app_request_duration_seconds Request latency by route.",
+        "# TYPE app_request_duration_seconds histogram",
+    ]
+    for route, data in sorted(totals.items()):
+        cumulative = 0
+        for bound, count in zip(BUCKETS, data["buckets"]):
+            cumulative += count
+            lines.append(f'app_request_duration_seconds_bucket{{route="{route}",le="{bound:g}"}} {cumulative}')
+        lines.append(f'app_request_duration_seconds_bucket{{route="{route}",le="+Inf"}} {data["count"]}')
+        lines.append(f'app_request_duration_seconds_sum{{route="{route}"}} {data["sum"]:.6f}')
+        lines.append(f'app_request_duration_seconds_count{{route="{route}"}} {data["count"]}')
+
+    if workers is not None:
+        lines += [
+            "# HELP app_workers Worker processes that reported metrics.",
+            "# TYPE app_workers gauge",
+            f"app_workers {workers}",
+        ]
+    return "\n".join(lines) + "\n"
+
+
+def worker_count(directory=METRICS_DIR):
+    return len(live_snapshots(directory))
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording status and latency per route template"""
+
+    def __init__(self, app, metrics):
+        self.app = app
+        self.metrics = metrics
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in EXCLUDED_PATHS:
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            # The route template keeps label cardinality bounded (no raw paths);
+            # routers are built with their prefix, so this is the full path
+            route = scope.get("route")
+            self.metrics.record(getattr(route, "path", "unmatched"), str(status),
+                                time.perf_counter() - start)
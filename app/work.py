@@ -0,0 +1,151 @@
+"""
+Synthetic workload endpoints, so benchmarks can exercise compute, waiting
+and transfer instead of only the network path.
+- GET {prefix}/cpu?kind=hash|matmul&n=...  CPU-bound work in a process pool
+  (the event loop keeps serving other requests meanwhile); an `n` above the
+  kind's limit is rejected with a 422
+- GET {prefix}/io?ms=...                   simulated backend latency (asyncio.sleep)
+- GET {prefix}/payload?size=...&chunk=...  streamed body of `size` bytes, sent in
+  chunks from one preallocated buffer, never built in memory as a whole
+One router is built per prefix (/work, /cluster1/work, /cluster2/work) so
+the ALB's path rules can send the work to a specific cluster, and each route
+keeps its full path, which is what /metrics labels requests with.
+"""
+
+import asyncio
+import hashlib
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.exception_handlers import http_exception_handler, request_validation_exception_handler
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import StreamingResponse
+from fastapi.routing import APIRoute
+
+PREFIXES = ["/work", "/cluster1/work", "/cluster2/work"]
+CPU_POOL_SIZE = int(os.environ.get("CPU_POOL_SIZE", 0)) or os.cpu_count() or 1
+
+MAX_HASH_ROUNDS = 10_000_000
+MAX_MATRIX_SIZE = 400
+MAX_IO_MS = 60_000
+MAX_PAYLOAD_BYTES = 1 << 30
+MAX_CHUNK_BYTES = 1 << 20
+
+_pool = None
+_chunk = bytes(MAX_CHUNK_BYTES)
+
+# ---------------------- CPU WORK (runs in the pool) ----------------------
+
+def hash_rounds(n):
+    """Chain `n` SHA-256 rounds; returns the final hex digest"""
+    digest = b"\0" * 32
+    for _ in range(n):
+        digest = hashlib.sha256(digest).digest()
+    return digest.hex()
+
+
+def matmul(n):
+    """Multiply two n x n matrices in pure Python; returns the trace"""
+    a = [[(i * n + j) % 7 for j in range(n)] for i in range(n)]
+    b = [[(i + j) % 5 for j in range(n)] for i in range(n)]
+    columns = list(zip(*b))
+    product = [[sum(x * y for x, y in zip(row, col)) for col in columns] for row in a]
+    return sum(product[i][i] for i in range(n))
+
+
+CPU_KINDS = {"hash": (hash_rounds, MAX_HASH_ROUNDS), "matmul": (matmul, MAX_MATRIX_SIZE)}
+
+
+def timed(fn, n):
+    start = time.perf_counter()
+    result = fn(n)
+    return result, (time.perf_counter() - start) * 1000, os.getpid()
+
+# ---------------------- POOL ----------------------
+
+def get_pool():
+    """The worker's process pool, started on first use"""
+    global _pool
+    if _pool is None:
+        # forkserver: children do not inherit the event loop or the log thread's locks
+        _pool = ProcessPoolExecutor(CPU_POOL_SIZE, mp_context=multiprocessing.get_context("forkserver"))
+    return _pool
+
+
+def shutdown_pool():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+# ---------------------- ROUTES ----------------------
+
+def header_route_class(headers):
+    """APIRoute adding `headers` to every response of the route, errors (422, 4xx) included"""
+    class HeaderRoute(APIRoute):
+        def get_route_handler(self):
+            handler = super().get_route_handler()
+
+            async def with_headers(request):
+                try:
+                    response = await handler(request)
+                except RequestValidationError as e:
+                    response = await request_validation_exception_handler(request, e)
+                except HTTPException as e:
+                    response = await http_exception_handler(request, e)
+                response.headers.update(headers)
+                return response
+
+            return with_headers
+
+    return HeaderRoute
+
+
+def n_too_large(n, limit, kind):
+    """The 422 FastAPI returns for Query(le=limit), for the kind-specific limit"""
+    return RequestValidationError([{
+        "type": "less_than_equal",
+        "loc": ("query", "n"),
+        "msg": f"Input should be less than or equal to {limit} for kind={kind}",
+        "input": n,
+        "ctx": {"le": limit},
+    }])
+
+
+def create_router(prefix, headers=None):
+    """Workload routes under `prefix`; `headers` are added to every response"""
+    router = APIRouter(prefix=prefix, route_class=header_route_class(headers or {}))
+
+    @router.get("/cpu")
+    async def cpu(kind: str = Query("hash", pattern="^(hash|matmul)$"),
+                  n: int = Query(10_000, ge=1, le=max(limit for _, limit in CPU_KINDS.values()))):
+        fn, limit = CPU_KINDS[kind]
+        if n > limit:
+            raise n_too_large(n, limit, kind)
+        loop = asyncio.get_running_loop()
+        result, elapsed_ms, pid = await loop.run_in_executor(get_pool(), timed, fn, n)
+        return {"kind": kind, "n": n, "result": result, "compute_ms": round(elapsed_ms, 3), "pool_pid": pid}
+
+    @router.get("/io")
+    async def io(ms: float = Query(50, ge=0, le=MAX_IO_MS)):
+        await asyncio.sleep(ms / 1000)
+        return {"slept_ms": ms}
+
+    @router.get("/payload")
+    async def payload(size: int = Query(1 << 20, ge=0, le=MAX_PAYLOAD_BYTES),
+                      chunk: int = Query(64 << 10, ge=1, le=MAX_CHUNK_BYTES)):
+        async def body():
+            view = memoryview(_chunk)
+            remaining = size
+            while remaining > 0:
+                n = min(chunk, remaining)
+                yield view[:n]
+                remaining -= n
+
+        return StreamingResponse(body(), media_type="application/octet-stream",
+                                 headers={"Content-Length": str(size)})
+
+    return router
@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Prebaked server artifact, so instances boot without yum/git/pip.
+- build: installs the server-only requirements (app/requirements.txt) as
+  binary wheels for the instances' platform and Python into site/, and
+  packs them with app/*.py into build/server-<digest>.tar.gz.
+- publish: uploads the tarball to S3 (once per digest) and returns a
+  presigned URL that user_data/server.sh downloads, so instances need no
+  IAM role.
+The digest covers the requirements, the app sources and the target
+Python/platform, so unchanged code is neither rebuilt nor re-uploaded.
+
+    python src/artifact.py build
+    python src/artifact.py publish --bucket my-bucket
+"""
+
+import argparse
+import glob
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tarfile
+import tempfile
+import time
+
+from setup import AMI_PYTHON
+
+try:
+    from packaging.specifiers import SpecifierSet
+except ImportError:
+    SpecifierSet = None
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP_DIR = os.path.join(ROOT, "app")
+BUILD_DIR = os.path.join(ROOT, "build")
+SERVER_REQUIREMENTS = os.path.join(APP_DIR, "requirements.txt")
+
+# The system python3 of the AMI setup.py launches; override for other AMIs
+PYTHON_VERSION = os.environ.get("ARTIFACT_PYTHON", AMI_PYTHON)
+PLATFORM = os.environ.get("ARTIFACT_PLATFORM", "manylinux2014_x86_64")
+URL_EXPIRES = 7 * 24 * 3600   # maximum for a presigned URL
+
+
+def app_files():
+    return sorted(glob.glob(os.path.join(APP_DIR, "*.py")))
+
+
+def artifact_digest(python_version=PYTHON_VERSION, platform=PLATFORM):
+    """Short hash of everything that goes into the artifact"""
+    digest = hashlib.sha256(f"{python_version}|{platform}".encode())
+    for path in [SERVER_REQUIREMENTS, *app_files()]:
+        digest.update(os.path.basename(path).encode())
+        with open(path, "rb") as f:
+            digest.update(f.read())
+    return digest.hexdigest()[:12]
+
+
+def check_requires_python(site, python_version):
+    """Fail if pip picked a distribution whose Requires-Python excludes the target"""
+    if SpecifierSet is None:
+        return
+    incompatible = []
+    for metadata in glob.glob(os.path.join(site, "*.dist-info", "METADATA")):
+        with open(metadata, encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    break  # end of the headers
+                if line.startswith("Requires-Python:"):
+                    spec = line.split(":", 1)[1].strip()
+                    if python_version not in SpecifierSet(spec):
+                        incompatible.append(f"{os.path.basename(os.path.dirname(metadata))} ({spec})")
+    if incompatible:
+        raise RuntimeError(f"Not installable on Python {python_version}: {', '.join(sorted(incompatible))}")
+
+
+def build_artifact(python_version=PYTHON_VERSION, platform=PLATFORM, force=False):
+    """Path of build/server-<digest>.tar.gz, building it if needed"""
+    digest = artifact_digest(python_version, platform)
+    path = os.path.join(BUILD_DIR, f"server-{digest}.tar.gz")
+    if os.path.exists(path) and not force:
+        print(f"📦 Artifact up to date: {path}")
+        return path
+
+    print(f"📦 Building server artifact for Python {python_version} ({platform})...")
+    start = time.perf_counter()
+    os.makedirs(BUILD_DIR, exist_ok=True)
+    with tempfile.TemporaryDirectory() as staging:
+        subprocess.run(
+            [sys.executable, "-m", "pip", "install", "--quiet", "--no-compile",
+             "--target", os.path.join(staging, "site"),
+             "--only-binary=:all:", "--platform", platform,
+             "--python-version", python_version, "--implementation", "cp",
+             "-r", SERVER_REQUIREMENTS],
+            check=True,
+        )
+        check_requires_python(os.path.join(staging, "site"), python_version)
+        os.makedirs(os.path.join(staging, "app"))
+        for source in [SERVER_REQUIREMENTS, *app_files()]:
+            shutil.copy2(source, os.path.join(staging, "app"))
+        with open(os.path.join(staging, "manifest.json"), "w") as f:
+            json.dump({"digest": digest, "python_version": python_version, "platform": platform,
+                       "built_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())}, f, indent=2)
+
+        tmp_path = f"{path}.tmp"
+        with tarfile.open(tmp_path, "w:gz") as tar:
+            for name in ("site", "app", "manifest.json"):
+                tar.add(os.path.join(staging, name), arcname=name)
+        os.replace(tmp_path, path)
+
+    size_mb = os.path.getsize(path) / 1e6
+    print(f"✅ Built {path} ({size_mb:.1f} MB) in {time.perf_counter() - start:.1f}s")
+    return path
+
+
+def default_bucket():
+    from aws_clients import REGION, get_client
+    account = get_client("sts").get_caller_identity()["Account"]
+    return f"lab01-artifacts-{account}-{REGION}"
+
+
+def upload_artifact(path, bucket=None, expires=URL_EXPIRES):
+    """Upload the artifact unless already there; returns a presigned download URL"""
+    from botocore.exceptions import ClientError
+    from aws_clients import REGION, get_client
+
+    s3 = get_client("s3")
+    bucket = bucket or os.environ.get("ARTIFACT_BUCKET") or default_bucket()
+    key = f"artifacts/{os.path.basename(path)}"
+
+    try:
+        s3.head_bucket(Bucket=bucket)
+    except ClientError:
+        print(f"🪣 Creating bucket {bucket}...")
+        if REGION == "us-east-1":
+            s3.create_bucket(Bucket=bucket)
+        else:
+            s3.create_bucket(Bucket=bucket, CreateBucketConfiguration={"LocationConstraint": REGION})
+
+    try:
+        s3.head_object(Bucket=bucket, Key=key)
+        print(f"☁️ s3://{bucket}/{key} already uploaded")
+    except ClientError:
+        print(f"☁️ Uploading to s3://{bucket}/{key}...")
+        s3.upload_file(path, bucket, key)
+
+    return s3.generate_presigned_url("get_object", Params={"Bucket": bucket, "Key": key}, ExpiresIn=expires)
+
+
+def publish_artifact(bucket=None, python_version=PYTHON_VERSION, platform=PLATFORM):
+    """Build (if needed) and upload the artifact; returns its download URL"""
+    return upload_artifact(build_artifact(python_version, platform), bucket)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build and publish the prebaked server artifact")
+    parser.add_argument("command", choices=["build", "publish"])
+    parser.add_argument("--python-version", default=PYTHON_VERSION, help="Python of the instances (e.g. 3.9)")
+    parser.add_argument("--platform", default=PLATFORM, help="Wheel platform tag of the instances")
+    parser.add_argument("--bucket", help="S3 bucket (default: ARTIFACT_BUCKET or lab01-artifacts-<account>-<region>)")
+    parser.add_argument("--force", action="store_true", help="Rebuild even if the digest is unchanged")
+    args = parser.parse_args()
+
+    path = build_artifact(args.python_version, args.platform, args.force)
+    if args.command == "publish":
+        print(f"🔗 {upload_artifact(path, args.bucket)}")
+
+
+if __name__ == "__main__":
+    main()
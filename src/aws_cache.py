@@ -0,0 +1,152 @@
+"""
+Short-TTL read-through cache for AWS describe calls.
+- Responses are keyed by (service, region, operation, parameters) and kept
+  for `ttl` seconds, in memory and in a local JSON file, so back-to-back
+  pipeline runs skip redundant control-plane calls.
+- Any write (an operation that is not Describe*/List*/Get*) made through a
+  shared client invalidates every cached entry of that service; the hook is
+  installed on all clients from aws_clients.
+- Hit and miss counters are kept per operation.
+"""
+
+import datetime
+import json
+import os
+import threading
+import time
+
+from aws_clients import REGION, get_client, register_client_hook
+
+CACHE_PATH = os.environ.get("AWS_CACHE_PATH", ".aws_cache.json")
+CACHE_TTL = float(os.environ.get("AWS_CACHE_TTL", "60"))
+READ_PREFIXES = ("Describe", "List", "Get")
+
+
+def _encode(value):
+    if isinstance(value, datetime.datetime):
+        return {"__datetime__": value.isoformat()}
+    raise TypeError(f"Cannot serialize {type(value).__name__}")
+
+
+def _decode(obj):
+    if "__datetime__" in obj:
+        return datetime.datetime.fromisoformat(obj["__datetime__"])
+    return obj
+
+
+class DescribeCache:
+    """Read-through cache of describe responses with a TTL"""
+
+    def __init__(self, path=CACHE_PATH, ttl=CACHE_TTL):
+        self.path = path
+        self.ttl = ttl
+        self.hits = {}
+        self.misses = {}
+        self._lock = threading.Lock()
+        self._entries = self._load()
+        register_client_hook(self._install_invalidation)
+
+    # ---------------------- PERSISTENCE ----------------------
+
+    def _load(self):
+        if not self.path or not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path) as f:
+                entries = json.load(f, object_hook=_decode)
+        except (OSError, ValueError):
+            return {}
+        now = time.time()
+        return {key: entry for key, entry in entries.items() if entry["expires"] > now}
+
+    def _save(self):
+        if not self.path:
+            return
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self._entries, f, default=_encode)
+        os.replace(tmp_path, self.path)
+
+    # ---------------------- INVALIDATION ----------------------
+
+    def _install_invalidation(self, client, service):
+        def on_call(model, **kwargs):
+            if not model.name.startswith(READ_PREFIXES):
+                self.invalidate(service)
+        client.meta.events.register("before-call", on_call, unique_id=f"describe-cache-{id(self)}")
+
+    def invalidate(self, service=None):
+        """Drop every entry, or only those of one service"""
+        with self._lock:
+            if service is None:
+                self._entries.clear()
+            else:
+                prefix = f"{service}|"
+                self._entries = {k: v for k, v in self._entries.items() if not k.startswith(prefix)}
+            self._save()
+
+    # ---------------------- LOOKUPS ----------------------
+
+    def _lookup(self, service, region, operation, params, fetch, fresh=False):
+        key = "|".join([service, region, operation, json.dumps(params, sort_keys=True, default=_encode)])
+        now = time.time()
+        with self._lock:
+            entry = None if fresh else self._entries.get(key)
+            if entry is not None and entry["expires"] > now:
+                self.hits[operation] = self.hits.get(operation, 0) + 1
+                return entry["response"]
+            self.misses[operation] = self.misses.get(operation, 0) + 1
+
+        response = fetch()
+        response.pop("ResponseMetadata", None)
+        with self._lock:
+            self._entries[key] = {"expires": now + self.ttl, "response": response}
+            self._save()
+        return response
+
+    def call(self, service, operation, region=None, fresh=False, **params):
+        """
+        Cached `client.<operation>(**params)`, e.g. call("ec2", "describe_subnets", Filters=...).
+        fresh=True always calls AWS (and stores the result for later readers).
+        """
+        region = region or REGION
+        client = get_client(service, region)
+        return self._lookup(service, region, operation, params,
+                            lambda: getattr(client, operation)(**params), fresh)
+
+    def paginate(self, service, operation, result_key, region=None, fresh=False, **params):
+        """Cached concatenation of `result_key` over every page of an operation (fresh: as in call)"""
+        region = region or REGION
+        client = get_client(service, region)
+
+        def fetch():
+            items = []
+            for page in client.get_paginator(operation).paginate(**params):
+                items.extend(page[result_key])
+            return {result_key: items}
+
+        return self._lookup(service, region, f"{operation}[pages]", params, fetch, fresh)[result_key]
+
+    def stats(self):
+        return {
+            "hits": sum(self.hits.values()),
+            "misses": sum(self.misses.values()),
+            "by_operation": {
+                op: {"hits": self.hits.get(op, 0), "misses": self.misses.get(op, 0)}
+                for op in sorted(set(self.hits) | set(self.misses))
+            },
+        }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_cache():
+    """The process-wide DescribeCache"""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = DescribeCache()
+    return _cache
@@ -0,0 +1,113 @@
+"""
+Shared boto3 session and client registry.
+- Clients are created lazily and cached per (service, region), so
+  credentials are resolved once and nothing is built for unused services.
+- Every client uses CLIENT_CONFIG: a larger connection pool than botocore's
+  default of 10, adaptive retries and explicit connect/read timeouts.
+- Safe to use from thread pools: creation is serialized by a lock (boto3
+  sessions are not thread-safe), clients are then shared, and resources,
+  which are not thread-safe, are cached per thread.
+"""
+
+import os
+import threading
+
+REGION = os.environ.get("AWS_REGION", os.environ.get("AWS_DEFAULT_REGION", "us-east-1"))
+
+MAX_POOL_CONNECTIONS = 50
+CONNECT_TIMEOUT = 5
+READ_TIMEOUT = 30
+MAX_ATTEMPTS = 10
+
+_lock = threading.Lock()
+_local = threading.local()
+_session = None
+_config = None
+_clients = {}
+_resources = []
+_client_hooks = []
+
+
+def client_config():
+    """Tuned botocore Config shared by every client"""
+    global _config
+    if _config is None:
+        from botocore.config import Config
+        _config = Config(
+            max_pool_connections=MAX_POOL_CONNECTIONS,
+            connect_timeout=CONNECT_TIMEOUT,
+            read_timeout=READ_TIMEOUT,
+            retries={"mode": "adaptive", "max_attempts": MAX_ATTEMPTS},
+            tcp_keepalive=True,
+        )
+    return _config
+
+
+def get_session():
+    """The process-wide boto3 session (credentials are resolved once)"""
+    global _session
+    if _session is None:
+        with _lock:
+            if _session is None:
+                import boto3
+                _session = boto3.session.Session()
+    return _session
+
+
+def get_client(service, region=None):
+    """Cached low-level client for a service; thread-safe"""
+    key = (service, region or REGION)
+    client = _clients.get(key)
+    if client is None:
+        session = get_session()
+        with _lock:
+            client = _clients.get(key)
+            if client is None:
+                client = session.client(service, region_name=key[1], config=client_config())
+                _clients[key] = client
+                for hook in _client_hooks:
+                    hook(client, service)
+    return client
+
+
+def get_resource(service, region=None):
+    """Cached high-level resource for a service, one per thread"""
+    key = (service, region or REGION)
+    resources = getattr(_local, "resources", None)
+    if resources is None:
+        resources = _local.resources = {}
+    if key not in resources:
+        session = get_session()
+        with _lock:
+            resource = session.resource(service, region_name=key[1], config=client_config())
+            resources[key] = resource
+            _resources.append((resource, service))
+            for hook in _client_hooks:
+                hook(resource.meta.client, service)
+    return resources[key]
+
+
+def register_client_hook(hook):
+    """
+    Call `hook(client, service)` on every client built so far and from now
+    on, including the clients behind resources (e.g. to register botocore
+    event handlers).
+    """
+    with _lock:
+        if hook in _client_hooks:
+            return
+        _client_hooks.append(hook)
+        existing = [(client, key[0]) for key, client in _clients.items()]
+        existing += [(resource.meta.client, service) for resource, service in _resources]
+    for client, service in existing:
+        hook(client, service)
+
+
+def clear():
+    """Drop the cached session, clients and this thread's resources"""
+    global _session
+    with _lock:
+        _session = None
+        _clients.clear()
+        _resources.clear()
+        _local.__dict__.clear()
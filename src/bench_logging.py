@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+Local load test of the app's request logging: throughput with logging off,
+on, and sampled. Each configuration starts app/serve.py with the matching
+LOG_* environment, writing logs to a temporary file like app.log on the
+instances.
+
+    python src/bench_logging.py -n 20000 -c 200 --sample 10
+"""
+
+import argparse
+import os
+import tempfile
+
+from bench_server import print_comparison, run_against_server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare app throughput with request logging on and off")
+    parser.add_argument("--path", default="/cluster1")
+    parser.add_argument("-n", "--num-requests", type=int, default=10000)
+    parser.add_argument("-c", "--concurrency", type=int, default=100)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--sample", type=int, default=10, help="N for the sampled run (log 1 of N)")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    configs = [
+        ("logging off", {"LOG_REQUESTS": "0"}),
+        ("logging on", {"LOG_REQUESTS": "1", "LOG_SAMPLE": "1"}),
+        (f"sampled 1/{args.sample}", {"LOG_REQUESTS": "1", "LOG_SAMPLE": str(args.sample)}),
+    ]
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for label, log_env in configs:
+            log_file = os.path.join(tmp, f"{label.replace(' ', '_').replace('/', '_')}.log")
+            env = {**os.environ, **log_env, "LOG_FILE": log_file}
+            print(f"🚀 {label}...")
+            report = run_against_server(args.port, args.workers, args.path,
+                                        args.num_requests, args.concurrency, env=env)
+            lines = 0
+            if os.path.exists(log_file):
+                with open(log_file) as f:
+                    lines = sum(1 for _ in f)
+            rows.append((label, report))
+            print(f"   {lines} log lines written")
+    print_comparison(rows)
+
+
+if __name__ == "__main__":
+    main()
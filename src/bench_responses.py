@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Requests/sec per core of the app's response layer, driven in-process
+through ASGI (no sockets, one thread), so only routing, handler and
+serialization costs are measured.
+- before: handlers returning dicts through FastAPI's default JSONResponse
+- after: prebuilt StaticPayload responses (app/responses.py), plus the
+  304 path for a client sending If-None-Match
+
+    python src/bench_responses.py -n 20000
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app"))
+
+from fastapi import FastAPI, Request  # noqa: E402
+
+from responses import StaticPayload  # noqa: E402
+
+PAYLOAD = {"status": "ok", "host": "cluster1", "message": "Request received by cluster1 instance"}
+
+
+def legacy_app():
+    app = FastAPI()
+
+    @app.get("/cluster1")
+    async def cluster1():
+        return dict(PAYLOAD)
+
+    return app
+
+
+def precomputed_app():
+    app = FastAPI()
+    payload = StaticPayload(PAYLOAD)
+
+    @app.get("/cluster1")
+    async def cluster1(request: Request):
+        return payload.respond(request)
+
+    return app, payload
+
+
+async def drive(app, n, path="/cluster1", headers=()):
+    """Send `n` GET requests straight to the ASGI app; returns (req/s, last status)"""
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": path, "raw_path": path.encode(), "query_string": b"",
+        "root_path": "", "headers": [(b"host", b"bench"), *headers],
+        "client": ("127.0.0.1", 1), "server": ("127.0.0.1", 80),
+    }
+    request_message = {"type": "http.request", "body": b"", "more_body": False}
+    status = None
+
+    async def receive():
+        return request_message
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+
+    for _ in range(min(n, 1000)):   # warm-up
+        await app(dict(scope), receive, send)
+    start = time.perf_counter()
+    for _ in range(n):
+        await app(dict(scope), receive, send)
+    return n / (time.perf_counter() - start), status
+
+
+async def run(n):
+    app, payload = precomputed_app()
+    return [
+        ("before: dict + JSONResponse", *await drive(legacy_app(), n)),
+        ("after: precomputed 200", *await drive(app, n)),
+        ("after: 304 Not Modified", *await drive(app, n, headers=[(b"if-none-match", payload.etag.encode())])),
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare per-core throughput of the app's response layer")
+    parser.add_argument("-n", "--num-requests", type=int, default=20000)
+    args = parser.parse_args()
+
+    rows = asyncio.run(run(args.num_requests))
+    baseline = rows[0][1]
+    print(f"\n{'config':<30} {'req/s/core':>11} {'speedup':>8} {'status':>7}")
+    for label, rps, status in rows:
+        print(f"{label:<30} {rps:>11.0f} {rps / baseline:>7.2f}x {status:>7}")
+
+
+if __name__ == "__main__":
+    main()
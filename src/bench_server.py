@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Local throughput benchmark of app/serve.py: 1 worker vs N workers.
+Starts the server on a local port for each worker count, waits until it
+answers, runs the closed-loop benchmark against /cluster1 and reports
+throughput and latency percentiles side by side.
+
+    python src/bench_server.py --workers 1 4 -n 20000 -c 200
+"""
+
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import time
+import urllib.request
+
+from benchmark import benchmark
+
+SERVE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app", "serve.py")
+
+
+def wait_for_server(url, timeout=30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with urllib.request.urlopen(url, timeout=1):
+                return
+        except OSError:
+            time.sleep(0.1)
+    raise TimeoutError(f"Server at {url} did not start within {timeout:.0f}s")
+
+
+def start_server(port, workers, extra_args=(), env=None):
+    """Launch serve.py in the background and wait until it answers"""
+    process = subprocess.Popen(
+        [sys.executable, SERVE, "--host", "127.0.0.1", "--port", str(port), "--workers", str(workers), *extra_args],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, env=env,
+    )
+    try:
+        wait_for_server(f"http://127.0.0.1:{port}/")
+    except Exception:
+        process.kill()
+        raise
+    return process
+
+
+def stop_server(process):
+    process.terminate()
+    try:
+        process.wait(timeout=10)
+    except subprocess.TimeoutExpired:
+        process.kill()
+
+
+def run_against_server(port, workers, path, num_requests, concurrency, extra_args=(), env=None):
+    """Benchmark report of one server configuration (after a short warm-up)"""
+    process = start_server(port, workers, extra_args, env)
+    url = f"http://127.0.0.1:{port}{path}"
+    try:
+        asyncio.run(benchmark(url, min(1000, num_requests), concurrency, progress=False, quiet=True))
+        stats = asyncio.run(benchmark(url, num_requests, concurrency, progress=False, quiet=True))
+    finally:
+        stop_server(process)
+    return stats.report()
+
+
+def print_comparison(rows):
+    """rows: [(label, report)]"""
+    print(f"\n{'config':<20} {'req/s':>10} {'p50 ms':>9} {'p99 ms':>9} {'errors':>8}")
+    for label, report in rows:
+        latency = report["latency_ms"]
+        print(f"{label:<20} {report['throughput_rps']:>10.1f} {latency['p50']:>9.2f} "
+              f"{latency['p99']:>9.2f} {report['errors']:>8}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare app/serve.py throughput across worker counts")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, os.cpu_count() or 1],
+                        help="Worker counts to compare (default: 1 and the CPU count)")
+    parser.add_argument("--path", default="/cluster1")
+    parser.add_argument("-n", "--num-requests", type=int, default=10000)
+    parser.add_argument("-c", "--concurrency", type=int, default=100)
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    rows = []
+    for workers in dict.fromkeys(args.workers):
+        print(f"🚀 {workers} worker(s)...")
+        report = run_against_server(args.port, workers, args.path, args.num_requests, args.concurrency)
+        rows.append((f"{workers} worker(s)", report))
+    print_comparison(rows)
+
+
+if __name__ == "__main__":
+    main()
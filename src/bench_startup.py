@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Measure src/main.py startup with `python -X importtime`.
+Runs `main.py --help` and reports the total import time and the slowest
+top-level imports, then checks that heavy modules are not imported at any
+depth (tests/test_startup.py asserts the same).
+
+    python src/bench_startup.py
+"""
+
+import os
+import subprocess
+import sys
+
+MAIN = os.path.join(os.path.dirname(os.path.abspath(__file__)), "main.py")
+HEAVY_MODULES = ["boto3", "botocore", "pandas", "matplotlib", "aiohttp"]
+
+
+def import_times(args, top_level=True):
+    """
+    {module: cumulative µs} of `python -X importtime main.py args`: top-level
+    imports only, or every module imported at any depth with top_level=False.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", MAIN, *args],
+        capture_output=True, text=True, check=True,
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        # Top-level imports are not indented
+        if not top_level or not name.startswith("  "):
+            times[name.strip()] = int(cumulative)
+    return times
+
+
+def heavy_imports(modules):
+    """HEAVY_MODULES (or submodules of them) among imported module names"""
+    return sorted({m for m in HEAVY_MODULES for name in modules if name == m or name.startswith(m + ".")})
+
+
+def main():
+    times = import_times(["--help"])
+    total = sum(times.values())
+    print(f"⏱️ main.py --help: {total / 1000:.1f} ms of imports")
+    for name, us in sorted(times.items(), key=lambda item: -item[1])[:10]:
+        print(f"   {us / 1000:8.1f} ms  {name}")
+
+    loaded = heavy_imports(import_times(["--help"], top_level=False))
+    if loaded:
+        print(f"❌ Heavy modules imported at startup: {', '.join(loaded)}")
+        return 1
+    print("✅ No heavy modules imported at startup")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark of the metrics-to-plot ingestion in visualize.py.
+Compares the previous per-datapoint dict loop + per-metric/per-group
+boolean masks against metrics_to_frame + a single groupby, on synthetic
+CloudWatch data (no rendering, only the data preparation).
+
+    python src/bench_visualize.py --hours 4
+"""
+
+import argparse
+import datetime
+import time
+
+import numpy as np
+import pandas as pd
+
+from visualize import metrics_to_frame
+
+METRICS = ["HealthyHostCount", "UnHealthyHostCount", "RequestCount", "TargetResponseTime",
+           "HTTPCode_Target_2XX_Count", "HTTPCode_Target_4XX_Count", "HTTPCode_Target_5XX_Count"]
+
+
+def synthetic_metrics(hours, target_groups=("cluster1", "cluster2", "ALB_Total")):
+    """metrics_data with one datapoint per second for every metric"""
+    start = datetime.datetime(2026, 1, 1, tzinfo=datetime.timezone.utc)
+    n = int(hours * 3600)
+    timestamps = [start + datetime.timedelta(seconds=i) for i in range(n)]
+    rng = np.random.default_rng(0)
+    data = {}
+    for tg in target_groups:
+        data[tg] = {}
+        for metric in METRICS:
+            values = rng.random(n).tolist()
+            data[tg][metric] = [{"Timestamp": ts, "Sum": v} for ts, v in zip(timestamps, values)]
+    return data
+
+
+def legacy_prepare(metrics_data):
+    """The ingestion visualize.py used before: dict per datapoint, masks per metric and group"""
+    plot_data = []
+    for tg_name, tg_metrics in metrics_data.items():
+        for metric_name, datapoints in tg_metrics.items():
+            for dp in datapoints:
+                value = next((dp[k] for k in ["Average", "Sum", "Maximum", "Minimum", "SampleCount"] if k in dp), None)
+                if dp.get("Timestamp") and value is not None:
+                    plot_data.append({"TargetGroup": tg_name, "Metric": metric_name,
+                                      "Timestamp": dp.get("Timestamp"), "Value": value})
+    df = pd.DataFrame(plot_data)
+    df["Timestamp"] = pd.to_datetime(df["Timestamp"])
+    series = []
+    for metric in df["Metric"].unique():
+        metric_df = df[df["Metric"] == metric]
+        for tg_name in sorted(metric_df["TargetGroup"].unique()):
+            tg_df = metric_df[metric_df["TargetGroup"] == tg_name].sort_values("Timestamp")
+            series.append((metric, tg_name, tg_df["Timestamp"], tg_df["Value"]))
+    return series
+
+
+def vectorized_prepare(metrics_data):
+    df = metrics_to_frame(metrics_data)
+    return [
+        (metric, tg_name, tg_df["Timestamp"].to_numpy(), tg_df["Value"].to_numpy())
+        for (metric, tg_name), tg_df in df.groupby(["Metric", "TargetGroup"], observed=True, sort=True)
+    ]
+
+
+def timed(fn, *args, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(*args)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark visualize.py data preparation")
+    parser.add_argument("--hours", type=float, default=1.0, help="Hours of 1-second datapoints per series")
+    args = parser.parse_args()
+
+    data = synthetic_metrics(args.hours)
+    rows = sum(len(dps) for tg in data.values() for dps in tg.values())
+    print(f"📊 {rows} datapoints ({args.hours:g} h at 1 s, {len(data)} groups x {len(METRICS)} metrics)")
+
+    legacy = timed(legacy_prepare, data)
+    vectorized = timed(vectorized_prepare, data)
+    print(f"   legacy loop + masks : {legacy:.3f} s")
+    print(f"   columnar + groupby  : {vectorized:.3f} s")
+    print(f"⚡ Speedup: {legacy / vectorized:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
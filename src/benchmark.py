@@ -3,64 +3,425 @@
 Benchmark script for AWS ALB.
 - Reads ALB DNS from alb_info.json.
 - Sends 1000 requests to /cluster1 and /cluster2.
+- Load is generated by load_engine: closed loop with N workers, or open
+  loop at a target RPS (--rate).
+- Records per-request latency in a log-bucketed histogram and reports
+  p50/p90/p99/p99.9, max, error rate and throughput per endpoint.
+- The request hot path only reads status and byte count; JSON decoding and
+  the `host` check are opt-in and sampled (--validate-every), and console
+  output is one aggregated progress line per second.
+- Uses a tuned connection pool (http_client) and reports how many
+  connections were opened vs reused.
+- With --workload the cluster endpoints are loaded concurrently with a
+  weighted path mix and ramp/steady phases (see workload.py).
+- With --processes N the load is spread over N worker processes whose
+  results are merged into one report (see distributed.py).
+- The X-Backend response header (cluster/instance/pid) is tallied per
+  instance, with its own latency histogram, to show load-balancing skew.
 """
 
 import asyncio
-import aiohttp
+import argparse
+import os
 import time
 import json
 import sys
+from dataclasses import dataclass, replace
+from functools import lru_cache
 
+from histogram import LatencyHistogram
+from http_client import ConnectionStats, add_client_arguments, config_from_args, create_session
+from load_engine import constant_rate_schedule, interleave, run_closed_loop, run_open_loop
 
-async def call_endpoint_http(session, request_num, url):
-    """Send a single HTTP request to the given URL"""
-    headers = {"content-type": "application/json"}
+BACKEND_HEADER = "X-Backend"
+
+
+@lru_cache(maxsize=1024)
+def backend_key(header):
+    """'cluster1/i-0abc/4242' -> 'cluster1/i-0abc' (one entry per instance, not per worker)"""
+    return header.rsplit("/", 1)[0] if header.count("/") >= 2 else header
+
+
+class EndpointStats:
+    """Latency histogram and counters for one benchmarked endpoint"""
+
+    def __init__(self, url):
+        self.url = url
+        self.histogram = LatencyHistogram()
+        self.status_counts = {}
+        self.errors = 0
+        self.bytes_received = 0
+        self.validated = 0
+        self.validation_failures = 0
+        self.elapsed = 0.0
+        self.connections = ConnectionStats()
+        self.backends = {}
+
+    def record(self, status_code, latency, nbytes=0, backend=None):
+        self.histogram.record_seconds(latency)
+        if backend is not None:
+            histogram = self.backends.get(backend)
+            if histogram is None:
+                histogram = self.backends[backend] = LatencyHistogram()
+            histogram.record_seconds(latency)
+        self.bytes_received += nbytes
+        key = str(status_code) if status_code is not None else "error"
+        self.status_counts[key] = self.status_counts.get(key, 0) + 1
+        if status_code is None or status_code >= 400:
+            self.errors += 1
+
+    def report(self):
+        total = self.histogram.total_count
+        return {
+            "url": self.url,
+            "requests": total,
+            "errors": self.errors,
+            "error_rate": self.errors / total if total else 0.0,
+            "elapsed_s": self.elapsed,
+            "throughput_rps": total / self.elapsed if self.elapsed else 0.0,
+            "status_counts": self.status_counts,
+            "bytes_received": self.bytes_received,
+            "validated": self.validated,
+            "validation_failures": self.validation_failures,
+            "latency_ms": self.histogram.summary(),
+            "connections": self.connections.report(),
+            "backends": self.backend_report(),
+        }
+
+    def backend_report(self):
+        """{instance: {requests, share, latency_ms}} from the X-Backend header"""
+        counted = sum(h.total_count for h in self.backends.values())
+        return {
+            backend: {
+                "requests": h.total_count,
+                "share": h.total_count / counted,
+                "latency_ms": h.summary((50, 99)),
+            }
+            for backend, h in sorted(self.backends.items())
+        }
+
+    def to_dict(self):
+        return {
+            **self.report(),
+            "histogram": self.histogram.to_dict(),
+            "backend_histograms": {backend: h.to_dict() for backend, h in self.backends.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        stats = cls(data["url"])
+        stats.merge_dict(data)
+        return stats
+
+    def merge_dict(self, data):
+        """
+        Merge the exported stats of another run of the same endpoint (e.g. a
+        worker process). Runs are assumed concurrent: elapsed is the longest.
+        """
+        self.histogram.merge(LatencyHistogram.from_dict(data["histogram"]))
+        for key, count in data["status_counts"].items():
+            self.status_counts[key] = self.status_counts.get(key, 0) + count
+        self.errors += data["errors"]
+        self.bytes_received += data["bytes_received"]
+        self.validated += data["validated"]
+        self.validation_failures += data["validation_failures"]
+        self.elapsed = max(self.elapsed, data["elapsed_s"])
+        self.connections.merge_report(data["connections"])
+        for backend, histogram in data.get("backend_histograms", {}).items():
+            if backend not in self.backends:
+                self.backends[backend] = LatencyHistogram()
+            self.backends[backend].merge(LatencyHistogram.from_dict(histogram))
+        return self
+
+
+@dataclass
+class RequestOptions:
+    """What call_endpoint_http does with each response"""
+    body_mode: str = "drain"    # "drain": count bytes chunk by chunk, "status": use Content-Length
+    validate_every: int = 0     # decode JSON and check `host` on 1 in N requests (0 = never)
+    expected_host: str = None   # value of the `host` field to expect, if any
+    verbose: bool = False       # print one line per request
+
+
+DEFAULT_OPTIONS = RequestOptions()
+
+
+def expected_host_for(url):
+    """`host` field app/main.py returns for a /clusterN URL, None otherwise"""
+    last = url.rstrip("/").rsplit("/", 1)[-1]
+    return last if last.startswith("cluster") else None
+
+
+def validate_body(body, expected_host):
+    """Check a sampled response body decodes and carries the expected host"""
+    try:
+        payload = json.loads(body)
+    except ValueError:
+        return False
+    return expected_host is None or payload.get("host") == expected_host
+
+
+async def call_endpoint_http(session, request_num, url, stats=None, intended_start=None,
+                             options=DEFAULT_OPTIONS):
+    """
+    Send a single HTTP request to the given URL.
+    Latency is measured from `intended_start` when given (open loop).
+    The body is never decoded unless this request is sampled for validation.
+    """
+    start = intended_start if intended_start is not None else time.perf_counter()
+    validate = options.validate_every and request_num % options.validate_every == 0
     try:
-        async with session.get(url, headers=headers) as response:
+        async with session.get(url) as response:
             status_code = response.status
-            response_json = await response.json()
-            print(f"Request {request_num}: Status Code: {status_code}")
-            return status_code, response_json
+            backend = response.headers.get(BACKEND_HEADER)
+            if validate:
+                body = await response.read()
+                nbytes = len(body)
+            elif options.body_mode == "status" and response.content_length is not None:
+                # Trust Content-Length; the body is still consumed (and each
+                # chunk dropped) so the connection can go back to the pool
+                nbytes = response.content_length
+                while await response.content.readany():
+                    pass
+            else:
+                nbytes = 0
+                async for chunk in response.content.iter_any():
+                    nbytes += len(chunk)
     except Exception as e:
-        print(f"Request {request_num}: Failed - {str(e)}")
+        if stats is not None:
+            stats.record(None, time.perf_counter() - start)
+        if options.verbose:
+            print(f"Request {request_num}: Failed - {str(e)}")
         return None, str(e)
 
+    latency = time.perf_counter() - start
+    if stats is not None:
+        stats.record(status_code, latency, nbytes, backend_key(backend) if backend else None)
+        if validate:
+            stats.validated += 1
+            if not validate_body(body, options.expected_host):
+                stats.validation_failures += 1
+    if options.verbose:
+        print(f"Request {request_num}: Status Code: {status_code} ({latency * 1000:.1f} ms)")
+    return status_code, nbytes
 
-async def benchmark(url: str, num_requests: int = 1000):
-    """Benchmark a given endpoint with N requests"""
-    print(f"\n🚀 Benchmarking {url} with {num_requests} requests...")
-    start_time = time.time()
 
-    async with aiohttp.ClientSession() as session:
-        tasks = [call_endpoint_http(session, i, url) for i in range(num_requests)]
-        await asyncio.gather(*tasks)
+async def report_progress(stats_list, interval=1.0):
+    """Print aggregated RPS, errors and p99 once per interval until cancelled"""
+    last_count = 0
+    while True:
+        await asyncio.sleep(interval)
+        histogram = LatencyHistogram()
+        for stats in stats_list:
+            histogram.merge(stats.histogram)
+        count = histogram.total_count
+        errors = sum(stats.errors for stats in stats_list)
+        p99 = histogram.percentile(99) / 1000
+        print(
+            f"   {count} req | {(count - last_count) / interval:.0f} req/s | "
+            f"{errors} errors | p99 {p99:.1f} ms",
+            flush=True,
+        )
+        last_count = count
 
-    end_time = time.time()
-    total_time = end_time - start_time
-    print(f"\n✅ Benchmark completed for {url}")
-    print(f"⏱️ Total time: {total_time:.2f} seconds")
-    print(f"⚡ Avg time per request: {total_time / num_requests:.4f} seconds")
 
+def print_report(report):
+    """Print a human readable summary of an endpoint report"""
+    lat = report["latency_ms"]
+    print(f"\n✅ Benchmark completed for {report['url']}")
+    print(f"⏱️ Total time: {report['elapsed_s']:.2f} seconds")
+    print(f"⚡ Throughput: {report['throughput_rps']:.1f} req/s")
+    print(f"❌ Errors: {report['errors']} ({report['error_rate']:.2%})")
+    if report["validated"]:
+        print(f"🔍 Validation: {report['validation_failures']} of {report['validated']} sampled responses failed")
+    print(
+        f"📊 Latency (ms): p50={lat['p50']:.2f} p90={lat['p90']:.2f} "
+        f"p99={lat['p99']:.2f} p99.9={lat['p99.9']:.2f} max={lat['max']:.2f}"
+    )
+    conn = report["connections"]
+    print(
+        f"🔌 Connections: {conn['new']} new, {conn['reused']} reused "
+        f"({conn['reuse_ratio']:.1%}), {conn['queued_for_pool']} waited for a pool slot"
+    )
+    print_backend_report(report["backends"])
 
-async def main():
-    # Load ALB info
+
+def print_backend_report(backends):
+    """Per-instance request share and latency, with the max/min skew"""
+    if not backends:
+        return
+    shares = [entry["share"] for entry in backends.values()]
+    skew = max(shares) / min(shares) if min(shares) else float("inf")
+    print(f"🖥️ Backends: {len(backends)} (max/min share {skew:.2f}x)")
+    for backend, entry in backends.items():
+        lat = entry["latency_ms"]
+        print(f"   {backend:<32} {entry['requests']:>8} req {entry['share']:>6.1%}  "
+              f"p50={lat['p50']:.2f} p99={lat['p99']:.2f} ms")
+
+
+async def benchmark(url: str, num_requests: int = 1000, concurrency: int = 100,
+                    rate: float = None, max_in_flight: int = 10000, client_config=None,
+                    options=None, progress=True, quiet=False, share=None):
+    """
+    Benchmark a given endpoint with N requests.
+    Closed loop with `concurrency` workers, or open loop at `rate` req/s.
+    With share=(index, parts) the open loop only sends this generator's
+    interleaved part of the N requests at `rate` (see distributed.py).
+    """
+    mode = f"{rate:g} req/s open loop" if rate else f"{concurrency} workers"
+    if not quiet:
+        print(f"\n🚀 Benchmarking {url} with {num_requests} requests ({mode})...")
+    options = options or RequestOptions()
+    if options.expected_host is None:
+        options = replace(options, expected_host=expected_host_for(url))
+    stats = EndpointStats(url)
+    start_time = time.perf_counter()
+    show_progress = progress and not quiet and not options.verbose
+    reporter = asyncio.create_task(report_progress([stats])) if show_progress else None
+
+    try:
+        async with create_session(client_config, stats.connections) as session:
+            async def request_fn(request_num, intended_start):
+                await call_endpoint_http(session, request_num, url, stats, intended_start, options)
+
+            if rate:
+                schedule = constant_rate_schedule(rate, num_requests)
+                if share:
+                    schedule = interleave(schedule, *share)
+                await run_open_loop(request_fn, schedule, max_in_flight)
+            else:
+                await run_closed_loop(request_fn, num_requests, concurrency)
+    finally:
+        if reporter is not None:
+            reporter.cancel()
+
+    stats.elapsed = time.perf_counter() - start_time
+    if not quiet:
+        print_report(stats.report())
+    return stats
+
+
+def export_results(results, path):
+    """Write per-endpoint reports and histograms as JSON for later comparison"""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, "w") as f:
+        json.dump({name: stats.to_dict() for name, stats in results.items()}, f, indent=2)
+    print(f"💾 Benchmark results saved in {path}")
+
+
+def load_base_url():
+    """Build the ALB base URL from alb_info.json"""
     try:
         with open("alb_info.json") as f:
             alb_info = json.load(f)
         base_url = f"http://{alb_info['DNSName']}"
         print(f"🌐 Using ALB DNS: {base_url}")
+        return base_url
     except Exception as e:
         print(f"❌ Could not load alb_info.json: {e}")
         sys.exit(1)
 
+
+async def run_benchmarks(base_url, num_requests=1000, concurrency=100, rate=None, client_config=None,
+                         options=None, processes=1, pin=False, workload=None):
+    """Run the cluster endpoints or a workload, in this process or across worker processes"""
+    if workload is not None:
+        from workload import print_workload_report, run_workload
+        if processes > 1:
+            from distributed import make_workload_job, run_distributed
+            job = make_workload_job(base_url, workload, client_config, options)
+            return await asyncio.to_thread(run_distributed, job, processes, pin=pin)
+        results = await run_workload(base_url, workload, client_config, options)
+        print_workload_report(results)
+        return results
+
     # Build URLs
     cluster1_url = f"{base_url}/cluster1"
     cluster2_url = f"{base_url}/cluster2"
 
+    if processes > 1:
+        from distributed import make_job, run_distributed
+        urls = {"cluster1": cluster1_url, "cluster2": cluster2_url}
+        job = make_job(urls, num_requests, concurrency, rate, client_config, options)
+        return await asyncio.to_thread(run_distributed, job, processes, pin=pin)
+
     # Run benchmarks
-    await benchmark(cluster1_url, 1000)
-    await benchmark(cluster2_url, 1000)
+    return {
+        "cluster1": await benchmark(cluster1_url, num_requests, concurrency, rate,
+                                    client_config=client_config, options=options),
+        "cluster2": await benchmark(cluster2_url, num_requests, concurrency, rate,
+                                    client_config=client_config, options=options),
+    }
+
+
+async def main(base_url=None, num_requests=1000, output="benchmark_results.json",
+               concurrency=100, rate=None, client_config=None, options=None,
+               processes=1, pin=False, workload=None, metrics_urls=None):
+    """
+    Benchmark and export the results. With `metrics_urls`, the servers'
+    /metrics are scraped before and after the run to report server-side
+    percentiles next to the client-side ones.
+    """
+    base_url = base_url or load_base_url()
+
+    if metrics_urls:
+        from scrape_metrics import SETTLE_SECONDS, print_server_report, scrape, server_side_report
+        before = await scrape(metrics_urls)
+
+    results = await run_benchmarks(base_url, num_requests, concurrency, rate, client_config,
+                                   options, processes, pin, workload)
+
+    if metrics_urls:
+        print_server_report(server_side_report(before, await scrape(metrics_urls, SETTLE_SECONDS)))
+    if output:
+        export_results(results, output)
+    return results
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark the ALB cluster endpoints")
+    parser.add_argument("--url", help="Base URL (defaults to the ALB DNS in alb_info.json)")
+    parser.add_argument("-n", "--requests", type=int, default=1000, help="Requests per endpoint")
+    parser.add_argument("-c", "--concurrency", type=int, default=100, help="Closed-loop workers")
+    parser.add_argument("--rate", type=float, help="Open-loop target RPS (disables closed loop)")
+    parser.add_argument("-o", "--output", default="benchmark_results.json", help="JSON results file")
+    parser.add_argument("--body", choices=["drain", "status"], default="drain",
+                        help="drain: count body bytes as they arrive; status: trust Content-Length")
+    parser.add_argument("--validate-every", type=int, default=0,
+                        help="Decode and check the `host` field on 1 in N responses (0 = off)")
+    parser.add_argument("-v", "--verbose", action="store_true", help="Print one line per request")
+    parser.add_argument("--workload", nargs="?", const="default",
+                        help="Run a mixed-traffic workload from a JSON spec (default mix if no file)")
+    parser.add_argument("-p", "--processes", type=int, default=1, help="Worker processes generating load")
+    parser.add_argument("--pin", action="store_true", help="Pin each worker process to one CPU")
+    parser.add_argument("--server-metrics", nargs="*", metavar="URL",
+                        help="Scrape /metrics before and after the run for server-side percentiles, "
+                             "summed over the URLs (default: <url>/metrics with --url, else every "
+                             "running instance; load balancer URLs are rejected)")
+    add_client_arguments(parser)
+    return parser.parse_args()
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    from workload import load_workload
+    args = parse_args()
+    try:
+        workload = load_workload(args.workload) if args.workload else None
+    except ValueError as e:
+        sys.exit(f"❌ Invalid workload {args.workload}: {e}")
+    metrics_urls = args.server_metrics
+    if metrics_urls is not None:
+        from scrape_metrics import check_instance_urls, instance_metrics_urls
+        if metrics_urls == []:
+            metrics_urls = [f"{args.url}/metrics"] if args.url else instance_metrics_urls()
+        try:
+            check_instance_urls(metrics_urls)
+        except ValueError as e:
+            sys.exit(f"❌ --server-metrics: {e}")
+    asyncio.run(main(args.url, args.requests, args.output, args.concurrency, args.rate,
+                     config_from_args(args),
+                     RequestOptions(args.body, args.validate_every, verbose=args.verbose),
+                     args.processes, args.pin,
+                     workload, metrics_urls))
@@ -1,13 +1,14 @@
-import boto3
 import json
 import csv
 import datetime
 import sys
 
-REGION = "us-east-1" 
+from aws_clients import REGION, get_client
+
+
+def cloudwatch_client():
+    return get_client("cloudwatch", REGION)
 
-cloudwatch = boto3.client("cloudwatch", region_name=REGION)
-elbv2 = boto3.client("elbv2", region_name=REGION)
 
 def load_alb_info():
     """Load ALB info from alb_info.json"""
@@ -16,48 +17,111 @@ def load_alb_info():
     return alb_info
 
 
-def get_metric(metric_name, namespace, dimensions, period=60, minutes=30, stat="Average"):
-    """Get metric data from CloudWatch"""
+# Metrics fetched for each target group and for the whole ALB: (name, stat)
+TARGET_GROUP_METRICS = [
+    ("HealthyHostCount", "Maximum"),
+    ("UnHealthyHostCount", "Maximum"),
+    ("RequestCount", "Sum"),
+    ("TargetResponseTime", "Average"),
+    ("HTTPCode_Target_2XX_Count", "Sum"),
+    ("HTTPCode_Target_4XX_Count", "Sum"),
+    ("HTTPCode_Target_5XX_Count", "Sum"),
+]
+ALB_METRICS = [
+    ("RequestCount", "Sum"),
+]
+MAX_QUERIES_PER_CALL = 500
+CACHE_PATH = "metrics_cache.sqlite"
+
+
+def build_queries(targets, namespace="AWS/ApplicationELB", period=60):
+    """
+    Build one MetricDataQuery per (label, metric) for every target.
+    `targets` is a list of (label, dimensions, [(metric_name, stat), ...]).
+    Returns the queries and a map from query Id back to (label, metric, stat).
+    """
+    queries = []
+    id_map = {}
+    for label, dimensions, metrics in targets:
+        for metric_name, stat in metrics:
+            query_id = f"q{len(queries)}"
+            id_map[query_id] = (label, metric_name, stat)
+            queries.append({
+                "Id": query_id,
+                "MetricStat": {
+                    "Metric": {
+                        "Namespace": namespace,
+                        "MetricName": metric_name,
+                        "Dimensions": dimensions,
+                    },
+                    "Period": period,
+                    "Stat": stat,
+                },
+                "ReturnData": True,
+            })
+    return queries, id_map
+
+
+def fetch_series(queries, start, end):
+    """
+    Run queries with as few get_metric_data calls as possible (500 queries
+    per call, following NextToken). Returns {query_id: (timestamps, values)};
+    the queries of a failed call are left out, so callers can tell them
+    apart from series that are simply empty.
+    """
+    series = {query["Id"]: ([], []) for query in queries}
+    for i in range(0, len(queries), MAX_QUERIES_PER_CALL):
+        kwargs = {
+            "MetricDataQueries": queries[i:i + MAX_QUERIES_PER_CALL],
+            "StartTime": start,
+            "EndTime": end,
+            "ScanBy": "TimestampAscending",
+        }
+        try:
+            while True:
+                response = cloudwatch_client().get_metric_data(**kwargs)
+                for result in response.get("MetricDataResults", []):
+                    timestamps, values = series[result["Id"]]
+                    timestamps.extend(result.get("Timestamps", []))
+                    values.extend(result.get("Values", []))
+                next_token = response.get("NextToken")
+                if not next_token:
+                    break
+                kwargs["NextToken"] = next_token
+        except Exception as e:
+            batch = queries[i:i + MAX_QUERIES_PER_CALL]
+            print(f"⚠️ Error getting metrics batch ({len(batch)} queries): {e}")
+            for query in batch:
+                del series[query["Id"]]
+    return series
+
+
+def demultiplex(id_map, series):
+    """Turn {query_id: (timestamps, values)} into the metrics_data shape"""
+    metrics_data = {}
+    for query_id, (label, metric_name, stat) in id_map.items():
+        timestamps, values = series.get(query_id, ([], []))
+        metrics_data.setdefault(label, {})[metric_name] = [
+            {"Timestamp": ts, stat: val} for ts, val in zip(timestamps, values)
+        ]
+    return metrics_data
+
+
+def get_metrics_batch(queries, id_map, minutes=30):
+    """
+    Fetch all queries in batched calls and demultiplex the results into
+    {label: {metric_name: [{"Timestamp": ts, stat: value}, ...]}}.
+    """
     end = datetime.datetime.utcnow()
     start = end - datetime.timedelta(minutes=minutes)
+    return demultiplex(id_map, fetch_series(queries, start, end))
 
-    try:
-        response = cloudwatch.get_metric_data(
-            MetricDataQueries=[
-                {
-                    'Id': 'm1', 
-                    'MetricStat': {
-                        'Metric': {
-                            'Namespace': namespace,
-                            'MetricName': metric_name,
-                            'Dimensions': dimensions
-                        },
-                        'Period': period,
-                        'Stat': stat,
-                    },
-                    'ReturnData': True,
-                }
-            ],
-            StartTime=start,
-            EndTime=end,
-            ScanBy='TimestampAscending'
-        )
-
-        results = response.get("MetricDataResults", [])
-        if not results:
-            return []
-
-        metric_result = results[0]
-        timestamps = metric_result.get("Timestamps", [])
-        values = metric_result.get("Values", [])
-
-        datapoints = [{"Timestamp": ts, stat: val} for ts, val in zip(timestamps, values)]
-        return datapoints
-    except Exception as e:
-        print(f"⚠️ Error getting metric {metric_name}: {e}")
-        return []
-
-def main():
+
+def main(cache_path=CACHE_PATH):
+    """
+    Fetch the last hour of ALB and target group metrics. With a cache_path,
+    only the datapoints missing from the local store are requested.
+    """
     alb_info = load_alb_info()
     lb_fullname = alb_info["LoadBalancerFullName"]
 
@@ -67,32 +131,27 @@ def main():
     }
 
     print("Fetching CloudWatch metrics for Target Groups...")
-    metrics_data = {}
-
+    targets = []
     for tg_label, tg_fullname in target_groups.items():
-        tg_arn = alb_info[f"TargetGroup{tg_label[-1]}"]
         print(f"  🔹 {tg_label} → {tg_fullname}")
-
         dimensions = [
             {"Name": "TargetGroup", "Value": tg_fullname},
             {"Name": "LoadBalancer", "Value": lb_fullname}
         ]
-        metrics_data[tg_label] = {
-            "HealthyHostCount": get_metric("HealthyHostCount", "AWS/ApplicationELB", dimensions, stat="Maximum", minutes=60),
-            "UnHealthyHostCount": get_metric("UnHealthyHostCount", "AWS/ApplicationELB", dimensions, stat="Maximum", minutes=60),
-            "RequestCount": get_metric("RequestCount", "AWS/ApplicationELB", dimensions, stat="Sum", minutes=60),
-            "TargetResponseTime": get_metric("TargetResponseTime", "AWS/ApplicationELB", dimensions, stat="Average", minutes=60),
-            "HTTPCode_Target_2XX_Count": get_metric("HTTPCode_Target_2XX_Count", "AWS/ApplicationELB", dimensions, stat="Sum", minutes=60),
-            "HTTPCode_Target_4XX_Count": get_metric("HTTPCode_Target_4XX_Count", "AWS/ApplicationELB", dimensions, stat="Sum", minutes=60),
-            "HTTPCode_Target_5XX_Count": get_metric("HTTPCode_Target_5XX_Count", "AWS/ApplicationELB", dimensions, stat="Sum", minutes=60),
-        }
+        targets.append((tg_label, dimensions, TARGET_GROUP_METRICS))
 
     print(f"Fetching overall metrics for ALB: {lb_fullname}")
     alb_dimensions = [{"Name": "LoadBalancer", "Value": lb_fullname}]
-    metrics_data["ALB_Total"] = {
-        "RequestCount": get_metric("RequestCount", "AWS/ApplicationELB", alb_dimensions, stat="Sum", minutes=60)
-    }
+    targets.append(("ALB_Total", alb_dimensions, ALB_METRICS))
+
+    queries, id_map = build_queries(targets)
+    if not cache_path:
+        return get_metrics_batch(queries, id_map, minutes=60)
 
+    from metrics_store import MetricsStore
+    with MetricsStore(cache_path) as store:
+        metrics_data = store.fetch(queries, id_map, fetch_series, minutes=60)
+        print(f"   {store.fetches} CloudWatch fetch(es), {store.cached_points} datapoints served from {cache_path}")
     return metrics_data
 
 
@@ -4,45 +4,58 @@ Create an AWS Application Load Balancer (ALB) with two Target Groups:
 - cluster1 → all t2.large instances
 - cluster2 → all t2.micro instances
 Automatically discovers subnets in the given VPC.
+
+The ALB is reconciled rather than recreated: the actual ALB, target groups,
+registered targets, listener and rules are diffed against the desired state
+and only the missing or different pieces are changed.
+
+    python src/create_alb.py          # plan and apply
+    python src/create_alb.py --plan   # only print the plan
 """
 
-import boto3
+import argparse
 import json
-import time
-from botocore.exceptions import ClientError
+from dataclasses import dataclass, field
+
+from aws_cache import get_cache
+from aws_clients import REGION, get_client
+from inventory import discover_instances
 
-REGION = "us-east-1"
 VPC_ID = "vpc-09e3cd495f3ccc275"
 SECURITY_GROUPS = ["sg-083dd7f63cb1cb9e5"]
 ALB_NAME = "lab01-alb"
+LISTENER_PORT = 80
+
+# Target group name → health check path and the instance type it serves
+TARGET_GROUPS = {
+    "cluster1-tg": {"health_path": "/cluster1", "instance_type": "t2.large"},
+    "cluster2-tg": {"health_path": "/cluster2", "instance_type": "t2.micro"},
+}
+# Listener rule priority → path pattern and target group name
+RULES = {
+    10: {"path": "/cluster1*", "target_group": "cluster1-tg"},
+    20: {"path": "/cluster2*", "target_group": "cluster2-tg"},
+}
 
-ec2 = boto3.client("ec2", region_name=REGION)
-elbv2 = boto3.client("elbv2", region_name=REGION)
+def ec2():
+    return get_client("ec2", REGION)
+
+def elbv2():
+    return get_client("elbv2", REGION)
 
 # ---------------------- LAB INSTANCES ----------------------
 
 def get_lab_instances():
-    """Return LAB01 instances grouped by type"""
-    response = ec2.describe_instances(
-        Filters=[
-            {"Name": "tag:Lab", "Values": ["LAB01"]},
-            {"Name": "instance-state-name", "Values": ["running"]}
-        ]
-    )
-    instances = {"t2.large": [], "t2.micro": []}
-    for reservation in response["Reservations"]:
-        for instance in reservation["Instances"]:
-            iid = instance["InstanceId"]
-            itype = instance["InstanceType"]
-            if itype in instances:
-                instances[itype].append(iid)
-    return instances
+    """Return running LAB01 instances grouped by type"""
+    inventory = discover_instances(states=["running"], instance_types=["t2.large", "t2.micro"],
+                                   region=REGION, fresh=True)
+    return {itype: inventory.ids(itype) for itype in ("t2.large", "t2.micro")}
 
 # ---------------------- SUBNETS ----------------------
 
 def get_subnets_for_vpc(vpc_id, min_required=2):
     """Automatically fetch subnets for a given VPC"""
-    response = ec2.describe_subnets(Filters=[{"Name": "vpc-id", "Values": [vpc_id]}])
+    response = get_cache().call("ec2", "describe_subnets", Filters=[{"Name": "vpc-id", "Values": [vpc_id]}])
     subnets_by_az = {}
     for subnet in response["Subnets"]:
         az = subnet["AvailabilityZone"]
@@ -54,44 +67,11 @@ def get_subnets_for_vpc(vpc_id, min_required=2):
         raise Exception(f"Not enough subnets in VPC {vpc_id} (found {len(chosen_subnets)})")
     return chosen_subnets
 
-# ---------------------- CLEANUP HELPERS ----------------------
-
-def delete_target_group_if_exists(name):
-    """Delete a Target Group if it exists"""
-    try:
-        tgs = elbv2.describe_target_groups(Names=[name])["TargetGroups"]
-        for tg in tgs:
-            arn = tg["TargetGroupArn"]
-            print(f"Deleting existing Target Group {name}...")
-            elbv2.delete_target_group(TargetGroupArn=arn)
-            time.sleep(2)
-    except ClientError as e:
-        if "TargetGroupNotFound" not in str(e):
-            raise
-
-def delete_alb_if_exists(name):
-    """Delete an ALB and its listeners if it exists"""
-    try:
-        lbs = elbv2.describe_load_balancers(Names=[name])["LoadBalancers"]
-        for lb in lbs:
-            lb_arn = lb["LoadBalancerArn"]
-            print(f"Deleting existing ALB {name} and its listeners...")
-            listeners = elbv2.describe_listeners(LoadBalancerArn=lb_arn)["Listeners"]
-            for listener in listeners:
-                elbv2.delete_listener(ListenerArn=listener["ListenerArn"])
-            elbv2.delete_load_balancer(LoadBalancerArn=lb_arn)
-            waiter = elbv2.get_waiter("load_balancers_deleted")
-            waiter.wait(LoadBalancerArns=[lb_arn])
-            time.sleep(2)
-    except ClientError as e:
-        if "LoadBalancerNotFound" not in str(e):
-            raise
-
 # ---------------------- TARGET GROUPS ----------------------
 
 def create_target_group(name, vpc_id, health_path):
     """Create HTTP target group on port 8000 with correct health check"""
-    tg = elbv2.create_target_group(
+    tg = elbv2().create_target_group(
         Name=name,
         Protocol="HTTP",
         Port=8000,
@@ -108,13 +88,19 @@ def register_targets(tg_arn, instance_ids):
     """Register EC2 instances into a target group"""
     if instance_ids:
         targets = [{"Id": iid} for iid in instance_ids]
-        elbv2.register_targets(TargetGroupArn=tg_arn, Targets=targets)
+        elbv2().register_targets(TargetGroupArn=tg_arn, Targets=targets)
+
+def deregister_targets(tg_arn, instance_ids):
+    """Remove EC2 instances from a target group"""
+    if instance_ids:
+        targets = [{"Id": iid} for iid in instance_ids]
+        elbv2().deregister_targets(TargetGroupArn=tg_arn, Targets=targets)
 
 # ---------------------- ALB ----------------------
 
 def create_alb(name, subnets, sg_ids):
     """Create the ALB"""
-    lb = elbv2.create_load_balancer(
+    lb = elbv2().create_load_balancer(
         Name=name,
         Subnets=subnets,
         SecurityGroups=sg_ids,
@@ -124,119 +110,270 @@ def create_alb(name, subnets, sg_ids):
     )
     return lb["LoadBalancers"][0]
 
-def create_listener(lb_arn, tg1_arn, tg2_arn):
-    """Create a listener with forward rules for /cluster1 and /cluster2"""
-    listener = elbv2.create_listener(
+def forward_to(tg_arns):
+    """Forward action splitting traffic evenly across target groups"""
+    return [{
+        "Type": "forward",
+        "ForwardConfig": {
+            "TargetGroups": [{"TargetGroupArn": arn, "Weight": 1} for arn in tg_arns]
+        }
+    }]
+
+def create_listener(lb_arn, tg_arns):
+    """Create the HTTP listener, forwarding to every target group by default"""
+    listener = elbv2().create_listener(
         LoadBalancerArn=lb_arn,
         Protocol="HTTP",
-        Port=80,
-        DefaultActions=[{
-            "Type": "forward",
-            "ForwardConfig": {
-                "TargetGroups": [
-                    {"TargetGroupArn": tg1_arn, "Weight": 1},
-                    {"TargetGroupArn": tg2_arn, "Weight": 1}
-                ]
-            }
-        }]
+        Port=LISTENER_PORT,
+        DefaultActions=forward_to(tg_arns)
     )
-    listener_arn = listener["Listeners"][0]["ListenerArn"]
+    return listener["Listeners"][0]["ListenerArn"]
 
-    # Add path-based rules
-    elbv2.create_rule(
+def create_rule(listener_arn, priority, path, tg_arn):
+    """Add a path-based forward rule"""
+    elbv2().create_rule(
         ListenerArn=listener_arn,
-        Priority=10,
-        Conditions=[{"Field": "path-pattern", "Values": ["/cluster1*"]}],
-        Actions=[{"Type": "forward", "TargetGroupArn": tg1_arn}]
+        Priority=priority,
+        Conditions=[{"Field": "path-pattern", "Values": [path]}],
+        Actions=[{"Type": "forward", "TargetGroupArn": tg_arn}]
     )
 
-    elbv2.create_rule(
-        ListenerArn=listener_arn,
-        Priority=20,
-        Conditions=[{"Field": "path-pattern", "Values": ["/cluster2*"]}],
-        Actions=[{"Type": "forward", "TargetGroupArn": tg2_arn}]
-    )
+# ---------------------- ACTUAL STATE ----------------------
+
+def rule_path(rule):
+    for condition in rule["Conditions"]:
+        if condition.get("Field") == "path-pattern":
+            values = condition.get("PathPatternConfig", {}).get("Values") or condition.get("Values", [])
+            return values[0] if values else None
+    return None
+
+def action_target_groups(actions):
+    """Target group ARNs a list of forward actions sends traffic to"""
+    arns = []
+    for action in actions:
+        if action.get("Type") != "forward":
+            continue
+        if action.get("ForwardConfig"):
+            arns += [tg["TargetGroupArn"] for tg in action["ForwardConfig"]["TargetGroups"]]
+        elif action.get("TargetGroupArn"):
+            arns.append(action["TargetGroupArn"])
+    return arns
+
+def get_actual_state(alb_name=ALB_NAME, tg_names=TARGET_GROUPS):
+    """
+    What currently exists, e.g.
+    {"alb": {arn, dns, security_groups} | None,
+     "target_groups": {name: {arn, health_path, targets}},
+     "listener": {arn, default_arns} | None,
+     "rules": {priority: {arn, path, tg_arn}}}
+    Read with fresh=True: cached entries may predate changes made elsewhere;
+    the fresh responses still refresh the cache for later readers.
+    """
+    cache = get_cache()
+    state = {"alb": None, "target_groups": {}, "listener": None, "rules": {}}
+
+    for tg in cache.paginate("elbv2", "describe_target_groups", "TargetGroups", fresh=True):
+        if tg["TargetGroupName"] not in tg_names:
+            continue
+        health = cache.call("elbv2", "describe_target_health", fresh=True, TargetGroupArn=tg["TargetGroupArn"])
+        state["target_groups"][tg["TargetGroupName"]] = {
+            "arn": tg["TargetGroupArn"],
+            "health_path": tg.get("HealthCheckPath"),
+            "targets": {
+                t["Target"]["Id"] for t in health["TargetHealthDescriptions"]
+                if t.get("TargetHealth", {}).get("State") != "draining"
+            },
+        }
+
+    lbs = [lb for lb in cache.paginate("elbv2", "describe_load_balancers", "LoadBalancers", fresh=True)
+           if lb["LoadBalancerName"] == alb_name]
+    if not lbs:
+        return state
+    lb = lbs[0]
+    state["alb"] = {"arn": lb["LoadBalancerArn"], "dns": lb["DNSName"],
+                    "security_groups": lb.get("SecurityGroups", [])}
+
+    listeners = cache.paginate("elbv2", "describe_listeners", "Listeners", fresh=True,
+                               LoadBalancerArn=lb["LoadBalancerArn"])
+    listeners = [l for l in listeners if l["Port"] == LISTENER_PORT]
+    if not listeners:
+        return state
+    listener = listeners[0]
+    state["listener"] = {"arn": listener["ListenerArn"],
+                         "default_arns": action_target_groups(listener["DefaultActions"])}
+
+    for rule in cache.call("elbv2", "describe_rules", fresh=True, ListenerArn=listener["ListenerArn"])["Rules"]:
+        if rule.get("IsDefault") or rule["Priority"] == "default":
+            continue
+        tg_arns = action_target_groups(rule["Actions"])
+        state["rules"][int(rule["Priority"])] = {
+            "arn": rule["RuleArn"],
+            "path": rule_path(rule),
+            "tg_arn": tg_arns[0] if tg_arns else None,
+        }
+    return state
+
+# ---------------------- PLAN ----------------------
+
+@dataclass
+class Change:
+    """One step of a plan; `run(arns)` applies it and may record new ARNs"""
+    action: str
+    resource: str
+    detail: str = ""
+    run: object = field(default=None, repr=False)
+
+    def __str__(self):
+        symbol = {"create": "+", "delete": "-", "register": "+", "deregister": "-"}.get(self.action, "~")
+        return f"  {symbol} {self.action} {self.resource}" + (f" ({self.detail})" if self.detail else "")
+
+def plan_changes(instances, actual):
+    """
+    Minimal ordered list of Changes turning `actual` into the desired state:
+    target groups, their targets, the ALB, the listener, then the rules.
+    ARNs of resources created earlier in the plan are passed through `arns`.
+    """
+    changes = []
+    tgs = actual["target_groups"]
+    arn_to_name = {tg["arn"]: name for name, tg in tgs.items()}
+
+    # Target groups and their registered instances
+    for name, spec in TARGET_GROUPS.items():
+        desired_targets = set(instances.get(spec["instance_type"], []))
+        current = tgs.get(name)
+        if current is None:
+            def run_create_target_group(arns, n=name, s=spec):
+                arns["tg"][n] = create_target_group(n, VPC_ID, s["health_path"])
+            changes.append(Change("create", f"target group {name}", f"health check {spec['health_path']}",
+                                  run=run_create_target_group))
+            current_targets = set()
+        else:
+            current_targets = current["targets"]
+            if current["health_path"] != spec["health_path"]:
+                changes.append(Change("update", f"target group {name}",
+                                      f"health check {current['health_path']} → {spec['health_path']}",
+                                      lambda arns, n=name, s=spec: elbv2().modify_target_group(
+                                          TargetGroupArn=arns["tg"][n], HealthCheckPath=s["health_path"])))
+
+        new_targets = sorted(desired_targets - current_targets)
+        old_targets = sorted(current_targets - desired_targets)
+        if new_targets:
+            changes.append(Change("register", f"targets in {name}", ", ".join(new_targets),
+                                  lambda arns, n=name, ids=new_targets: register_targets(arns["tg"][n], ids)))
+        if old_targets:
+            changes.append(Change("deregister", f"targets in {name}", ", ".join(old_targets),
+                                  lambda arns, n=name, ids=old_targets: deregister_targets(arns["tg"][n], ids)))
+
+    # Load balancer
+    alb = actual["alb"]
+    if alb is None:
+        def run_create_alb(arns):
+            lb = create_alb(ALB_NAME, get_subnets_for_vpc(VPC_ID, min_required=2), SECURITY_GROUPS)
+            arns["alb"] = lb["LoadBalancerArn"]
+            arns["dns"] = lb["DNSName"]
+        changes.append(Change("create", f"load balancer {ALB_NAME}", run=run_create_alb))
+    elif sorted(alb["security_groups"]) != sorted(SECURITY_GROUPS):
+        changes.append(Change("update", f"load balancer {ALB_NAME}", f"security groups → {SECURITY_GROUPS}",
+                              lambda arns: elbv2().set_security_groups(
+                                  LoadBalancerArn=arns["alb"], SecurityGroups=SECURITY_GROUPS)))
+
+    # Listener, forwarding to every target group by default
+    listener = actual["listener"]
+    tg_names = list(TARGET_GROUPS)
+    if listener is None:
+        def run_create_listener(arns):
+            arns["listener"] = create_listener(arns["alb"], [arns["tg"][n] for n in tg_names])
+        changes.append(Change("create", f"listener :{LISTENER_PORT}", f"default → {', '.join(tg_names)}",
+                              run=run_create_listener))
+    elif sorted(arn_to_name.get(arn, arn) for arn in listener["default_arns"]) != sorted(tg_names):
+        changes.append(Change("update", f"listener :{LISTENER_PORT}", f"default → {', '.join(tg_names)}",
+                              lambda arns: elbv2().modify_listener(
+                                  ListenerArn=arns["listener"],
+                                  DefaultActions=forward_to([arns["tg"][n] for n in tg_names]))))
+
+    # Path-based rules
+    rules = actual["rules"] if listener is not None else {}
+    for priority, spec in RULES.items():
+        tg_name = spec["target_group"]
+        current = rules.get(priority)
+        if current is None:
+            changes.append(Change("create", f"rule {priority}", f"{spec['path']} → {tg_name}",
+                                  lambda arns, p=priority, s=spec: create_rule(
+                                      arns["listener"], p, s["path"], arns["tg"][s["target_group"]])))
+        elif current["path"] != spec["path"] or arn_to_name.get(current["tg_arn"]) != tg_name:
+            changes.append(Change("update", f"rule {priority}", f"{spec['path']} → {tg_name}",
+                                  lambda arns, r=current["arn"], s=spec: elbv2().modify_rule(
+                                      RuleArn=r,
+                                      Conditions=[{"Field": "path-pattern", "Values": [s["path"]]}],
+                                      Actions=[{"Type": "forward",
+                                                "TargetGroupArn": arns["tg"][s["target_group"]]}])))
+    for priority in sorted(set(rules) - set(RULES)):
+        changes.append(Change("delete", f"rule {priority}", rules[priority]["path"] or "",
+                              lambda arns, r=rules[priority]["arn"]: elbv2().delete_rule(RuleArn=r)))
+
+    return changes
+
+# ---------------------- APPLY ----------------------
+
+def apply_changes(changes, actual):
+    """Run a plan in order; returns the ARNs of everything it touched or created"""
+    arns = {
+        "tg": {name: tg["arn"] for name, tg in actual["target_groups"].items()},
+        "alb": actual["alb"]["arn"] if actual["alb"] else None,
+        "dns": actual["alb"]["dns"] if actual["alb"] else None,
+        "listener": actual["listener"]["arn"] if actual["listener"] else None,
+    }
+    for change in changes:
+        print(f"🔧 {change.action.capitalize()} {change.resource}...")
+        change.run(arns)
+    return arns
 
 # ---------------------- MAIN ----------------------
 
-def alb_and_tgs_exist(alb_name, tg_names):
-    """Check if ALB and all required Target Groups exist."""
-    alb_exists = False
-    tg_exist = {name: False for name in tg_names}
-
-    try:
-        lbs = elbv2.describe_load_balancers(Names=[alb_name])["LoadBalancers"]
-        if lbs:
-            alb_exists = True
-    except ClientError as e:
-        if "LoadBalancerNotFound" not in str(e):
-            raise
-
-    for name in tg_names:
-        try:
-            tgs = elbv2.describe_target_groups(Names=[name])["TargetGroups"]
-            if tgs:
-                tg_exist[name] = True
-        except ClientError as e:
-            if "TargetGroupNotFound" not in str(e):
-                raise
-
-    return alb_exists, tg_exist
-
-def main():
+def save_alb_info(arns, path="alb_info.json"):
+    alb_info = {
+        "LoadBalancerName": ALB_NAME,
+        "LoadBalancerArn": arns["alb"],
+        # CloudWatch's LoadBalancer dimension: app/<name>/<id>
+        "LoadBalancerFullName": arns["alb"].split(":loadbalancer/")[-1],
+        "DNSName": arns["dns"],
+        "TargetGroup1": arns["tg"]["cluster1-tg"],
+        "TargetGroup2": arns["tg"]["cluster2-tg"]
+    }
+    with open(path, "w") as f:
+        json.dump(alb_info, f, indent=2)
+    return alb_info
+
+def main(plan_only=False):
     print("🔎 Getting running LAB01 instances...")
     instances = get_lab_instances()
     print(f"  t2.large: {instances['t2.large']}")
     print(f"  t2.micro: {instances['t2.micro']}")
 
-    tg_names = ["cluster1-tg", "cluster2-tg"]
-    alb_exists, tg_exist = alb_and_tgs_exist(ALB_NAME, tg_names)
+    print("🔎 Reading current ALB state...")
+    actual = get_actual_state()
+    changes = plan_changes(instances, actual)
 
-    if alb_exists and all(tg_exist.values()):
-        print("✅ ALB and Target Groups already exist. Skipping creation.")
-        return
+    if not changes:
+        print("✅ ALB, listener, rules and Target Groups are up to date.")
     else:
-        print("⚠️ ALB/Target Groups missing. Re-creating all...")
-
-    delete_alb_if_exists(ALB_NAME)
-    delete_target_group_if_exists("cluster1-tg")
-    delete_target_group_if_exists("cluster2-tg")
-
-    print("🌍 Discovering subnets automatically...")
-    subnets = get_subnets_for_vpc(VPC_ID, min_required=2)
-    print(f"   Using subnets: {subnets}")
-
-    print("🌐 Creating target groups...")
-    tg1_arn = create_target_group("cluster1-tg", VPC_ID, health_path="/cluster1")
-    tg2_arn = create_target_group("cluster2-tg", VPC_ID, health_path="/cluster2")
+        print(f"📋 Plan: {len(changes)} change(s)")
+        for change in changes:
+            print(change)
+    if plan_only:
+        return changes
 
-    print("🔗 Registering instances...")
-    register_targets(tg1_arn, instances["t2.large"])
-    register_targets(tg2_arn, instances["t2.micro"])
-
-    print("⚖️ Creating ALB...")
-    lb = create_alb(ALB_NAME, subnets, SECURITY_GROUPS)
-    lb_arn = lb["LoadBalancerArn"]
-    dns = lb["DNSName"]
-
-    print("🎧 Creating listener and rules...")
-    create_listener(lb_arn, tg1_arn, tg2_arn)
-
-    alb_info = {
-        "LoadBalancerName": ALB_NAME,
-        "LoadBalancerArn": lb_arn,
-        "LoadBalancerFullName": lb["LoadBalancerName"],
-        "DNSName": dns,
-        "TargetGroup1": tg1_arn,
-        "TargetGroup2": tg2_arn
-    }
-    with open("alb_info.json", "w") as f:
-        json.dump(alb_info, f, indent=2)
+    arns = apply_changes(changes, actual)
+    save_alb_info(arns)
 
-    print("\n✅ ALB created successfully!")
+    print("\n✅ ALB reconciled successfully!")
     print(f"   Name: {ALB_NAME}")
-    print(f"   DNS: {dns}")
+    print(f"   DNS: {arns['dns']}")
     print("   Info saved in alb_info.json")
+    return changes
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Reconcile the LAB01 ALB, listener, rules and target groups")
+    parser.add_argument("--plan", action="store_true", help="Only print the changes, do not apply them")
+    args = parser.parse_args()
+    main(plan_only=args.plan)
@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+"""
+Distributed load generation for benchmark.py.
+- A coordinator listens on a TCP socket and hands the same job to N workers.
+- Each worker runs the benchmark engine on its own event loop with its share
+  of the requests and concurrency (open loop: every N-th arrival of the
+  common schedule), then sends back its exported stats.
+- The coordinator merges histograms and counters into one report.
+Messages are newline-delimited JSON, so the protocol is identical whether the
+workers are forked locally (connecting over 127.0.0.1) or run on other hosts:
+
+    python src/distributed.py coordinator --workers 8 --bind 0.0.0.0:9100 --remote --url http://...
+    python src/distributed.py worker --connect <coordinator-ip>:9100      # on each load host
+"""
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import socket
+import sys
+import time
+from dataclasses import asdict
+
+from benchmark import EndpointStats, RequestOptions, benchmark, export_results, print_report
+from http_client import ClientConfig
+from workload import print_workload_report, run_workload
+
+START_DELAY = 1.0   # seconds between handing out the job and the common start time
+CONNECT_TIMEOUT = 60.0   # seconds to wait for every worker to connect
+ACCEPT_POLL = 0.5   # seconds between liveness checks of local workers while accepting
+
+
+# ---------------------- PROTOCOL ----------------------
+
+def send_message(stream, message):
+    stream.write(json.dumps(message) + "\n")
+    stream.flush()
+
+
+def receive_message(stream):
+    line = stream.readline()
+    if not line:
+        raise ConnectionError("Peer closed the connection")
+    return json.loads(line)
+
+
+def split_evenly(total, parts, index):
+    """Share of `total` for part `index` when split into `parts`"""
+    return total // parts + (1 if index < total % parts else 0)
+
+
+def worker_share(job, worker_id, num_workers):
+    """
+    The part of a job a single worker runs. Closed-loop requests and workers
+    are split evenly; open-loop jobs (rate or workload) keep the whole
+    schedule and each worker sends every num_workers-th arrival of it, so the
+    combined stream has the requested spacing instead of N-request bursts.
+    """
+    share = dict(job)
+    share["concurrency"] = max(1, split_evenly(job["concurrency"], num_workers, worker_id))
+    if job.get("rate") or job.get("workload"):
+        share["share"] = [worker_id, num_workers]
+    else:
+        share["num_requests"] = split_evenly(job["num_requests"], num_workers, worker_id)
+    return share
+
+
+# ---------------------- WORKER ----------------------
+
+async def run_job(job):
+    """Run every endpoint of a job on this process' event loop"""
+    client_config = ClientConfig(**job["client_config"])
+    options = RequestOptions(**job["options"])
+    if job.get("workload"):
+        results = await run_workload(job["base_url"], job["workload"], client_config, options, quiet=True,
+                                     share=job.get("share"))
+        return {name: stats.to_dict() for name, stats in results.items()}
+
+    results = {}
+    for name, url in job["urls"].items():
+        stats = await benchmark(url, job["num_requests"], job["concurrency"], job.get("rate"),
+                                client_config=client_config, options=options, quiet=True,
+                                share=job.get("share"))
+        results[name] = stats.to_dict()
+    return results
+
+
+def run_worker(host, port, cpu=None):
+    """Connect to a coordinator, run the job it sends and send back the results"""
+    if cpu is not None and hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, {cpu})
+
+    with socket.create_connection((host, port)) as sock, sock.makefile("rw") as stream:
+        send_message(stream, {"type": "hello", "host": socket.gethostname(), "pid": os.getpid()})
+        message = receive_message(stream)
+        job = worker_share(message["job"], message["worker_id"], message["num_workers"])
+
+        delay = message["start_at"] - time.time()
+        if delay > 0:
+            time.sleep(delay)
+
+        try:
+            results = asyncio.run(run_job(job))
+            send_message(stream, {"type": "result", "worker_id": message["worker_id"], "results": results})
+        except Exception as e:
+            send_message(stream, {"type": "error", "worker_id": message["worker_id"], "error": str(e)})
+
+
+# ---------------------- COORDINATOR ----------------------
+
+def accept_worker(server, processes, connected, num_workers, deadline):
+    """
+    Next worker connection. Fails if a local worker exits before connecting
+    or if not every worker has connected by `deadline`.
+    """
+    server.settimeout(ACCEPT_POLL)
+    while True:
+        try:
+            return server.accept()
+        except socket.timeout:
+            pass
+        for process in processes:
+            if not process.is_alive():
+                raise RuntimeError(f"Local worker (pid {process.pid}) exited with code "
+                                   f"{process.exitcode} before the job started")
+        if time.monotonic() > deadline:
+            raise TimeoutError(f"Only {connected} of {num_workers} workers connected before the timeout")
+
+
+def run_coordinator(job, num_workers, bind=("127.0.0.1", 0), spawn_local=True, pin=False,
+                    connect_timeout=CONNECT_TIMEOUT):
+    """
+    Distribute `job` to `num_workers` workers and merge their results.
+    With spawn_local the workers are forked here; otherwise the coordinator
+    waits for remote workers to connect to `bind`, for at most
+    `connect_timeout` seconds.
+    """
+    processes = []
+    with socket.create_server(bind) as server:
+        host, port = server.getsockname()[:2]
+        if spawn_local:
+            cpus = sorted(os.sched_getaffinity(0)) if pin and hasattr(os, "sched_getaffinity") else None
+            for i in range(num_workers):
+                cpu = cpus[i % len(cpus)] if cpus else None
+                process = multiprocessing.Process(target=run_worker, args=(host, port, cpu), daemon=True)
+                process.start()
+                processes.append(process)
+        else:
+            print(f"📡 Waiting for {num_workers} workers on {host}:{port}...")
+
+        connections = []
+        deadline = time.monotonic() + connect_timeout
+        try:
+            for _ in range(num_workers):
+                conn, address = accept_worker(server, processes, len(connections), num_workers, deadline)
+                stream = conn.makefile("rw")
+                connections.append((conn, stream))
+                # The hello is bounded by the same deadline as the connections
+                conn.settimeout(max(0.0, deadline - time.monotonic()))
+                try:
+                    hello = receive_message(stream)
+                except socket.timeout:
+                    raise TimeoutError(f"Worker at {address[0]}:{address[1]} connected but sent no hello "
+                                       f"before the timeout") from None
+                conn.settimeout(None)
+                if not spawn_local:
+                    print(f"   worker connected: {hello['host']} (pid {hello['pid']})")
+
+            start_at = time.time() + START_DELAY
+            for worker_id, (_, stream) in enumerate(connections):
+                send_message(stream, {
+                    "type": "job",
+                    "worker_id": worker_id,
+                    "num_workers": num_workers,
+                    "start_at": start_at,
+                    "job": job,
+                })
+
+            merged = {}
+            for _, stream in connections:
+                message = receive_message(stream)
+                if message["type"] == "error":
+                    raise RuntimeError(f"Worker {message['worker_id']} failed: {message['error']}")
+                for name, data in message["results"].items():
+                    if name in merged:
+                        merged[name].merge_dict(data)
+                    else:
+                        merged[name] = EndpointStats.from_dict(data)
+        finally:
+            for conn, stream in connections:
+                stream.close()
+                conn.close()
+            for process in processes:
+                process.join(timeout=5)
+
+    return merged
+
+
+def make_workload_job(base_url, spec, client_config=None, options=None):
+    """Build a job running a mixed-traffic workload (see workload.py)"""
+    return {
+        "base_url": base_url,
+        "workload": spec,
+        "num_requests": 0,
+        "concurrency": 1,
+        "client_config": (client_config or ClientConfig()).to_dict(),
+        "options": asdict(options or RequestOptions()),
+    }
+
+
+def make_job(urls, num_requests, concurrency=100, rate=None, client_config=None, options=None):
+    """Build the JSON-serializable job description sent to workers"""
+    return {
+        "urls": urls,
+        "num_requests": num_requests,
+        "concurrency": concurrency,
+        "rate": rate,
+        "client_config": (client_config or ClientConfig()).to_dict(),
+        "options": asdict(options or RequestOptions()),
+    }
+
+
+def run_distributed(job, num_workers, **kwargs):
+    """Run a job over several workers and print the merged per-endpoint reports"""
+    if job.get("workload"):
+        print(f"\n🚀 Running workload on {job['base_url']} over {num_workers} workers...")
+    else:
+        print(f"\n🚀 Running {job['num_requests']} requests per endpoint over {num_workers} workers...")
+    results = run_coordinator(job, num_workers, **kwargs)
+    if job.get("workload"):
+        print_workload_report(results)
+    else:
+        for stats in results.values():
+            print_report(stats.report())
+    return results
+
+
+def parse_address(value):
+    host, _, port = value.rpartition(":")
+    return host or "0.0.0.0", int(port)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Distributed benchmark coordinator / worker")
+    sub = parser.add_subparsers(dest="role", required=True)
+
+    coord = sub.add_parser("coordinator", help="Hand out a benchmark job and merge the results")
+    coord.add_argument("--url", required=True, help="Base URL of the ALB")
+    coord.add_argument("--workers", type=int, default=os.cpu_count(), help="Number of workers")
+    coord.add_argument("--bind", default="127.0.0.1:0", help="host:port to listen on")
+    coord.add_argument("--remote", action="store_true", help="Wait for remote workers instead of forking")
+    coord.add_argument("--pin", action="store_true", help="Pin each local worker to one CPU")
+    coord.add_argument("--connect-timeout", type=float, default=CONNECT_TIMEOUT,
+                       help="Seconds to wait for all workers to connect")
+    coord.add_argument("-n", "--requests", type=int, default=1000, help="Total requests per endpoint")
+    coord.add_argument("-c", "--concurrency", type=int, default=100, help="Total closed-loop workers")
+    coord.add_argument("--rate", type=float, help="Total open-loop target RPS")
+    coord.add_argument("-o", "--output", default="benchmark_results.json", help="JSON results file")
+
+    work = sub.add_parser("worker", help="Connect to a coordinator and run its job")
+    work.add_argument("--connect", required=True, help="Coordinator host:port")
+
+    args = parser.parse_args()
+    if args.role == "worker":
+        run_worker(*parse_address(args.connect))
+        return
+
+    urls = {"cluster1": f"{args.url}/cluster1", "cluster2": f"{args.url}/cluster2"}
+    job = make_job(urls, args.requests, args.concurrency, args.rate)
+    results = run_distributed(job, args.workers, bind=parse_address(args.bind),
+                              spawn_local=not args.remote, pin=args.pin, connect_timeout=args.connect_timeout)
+    if args.output:
+        export_results(results, args.output)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,132 @@
+"""
+HDR-style latency histogram with bounded memory.
+- Values are recorded as integer microseconds.
+- Buckets are log-linear: each power of two is split into a fixed number of
+  linear sub-buckets, so relative error stays constant (~1% with 7 bits)
+  while memory stays a few KB whatever the number of samples.
+"""
+
+import json
+import math
+
+
+class LatencyHistogram:
+    """Log-bucketed latency histogram (values in microseconds)"""
+
+    def __init__(self, max_value_us=60_000_000, sub_bucket_bits=7):
+        self.max_value_us = int(max_value_us)
+        self.sub_bucket_bits = sub_bucket_bits
+        self.sub_bucket_count = 1 << sub_bucket_bits
+        self.sub_bucket_half = self.sub_bucket_count // 2
+        self.counts = [0] * (self._index_for(self.max_value_us) + 1)
+        self.total_count = 0
+        self.min_us = None
+        self.max_us = 0
+        self.sum_us = 0
+
+    # ---------------------- BUCKETING ----------------------
+
+    def _index_for(self, value):
+        """Flat counts index for an integer value"""
+        bucket = max(0, value.bit_length() - self.sub_bucket_bits)
+        sub = value >> bucket
+        return (bucket + 1) * self.sub_bucket_half + (sub - self.sub_bucket_half)
+
+    def _highest_equivalent(self, index):
+        """Highest value that falls into the bucket at the given index"""
+        if index < self.sub_bucket_count:
+            return index
+        bucket = index // self.sub_bucket_half - 1
+        sub = index % self.sub_bucket_half + self.sub_bucket_half
+        return (sub << bucket) + (1 << bucket) - 1
+
+    # ---------------------- RECORDING ----------------------
+
+    def record(self, value_us, count=1):
+        """Record a latency in microseconds (clamped to max_value_us)"""
+        value = min(max(int(value_us), 0), self.max_value_us)
+        self.counts[self._index_for(value)] += count
+        self.total_count += count
+        self.sum_us += value * count
+        if self.min_us is None or value < self.min_us:
+            self.min_us = value
+        if value > self.max_us:
+            self.max_us = value
+
+    def record_seconds(self, seconds, count=1):
+        """Record a latency given in seconds"""
+        self.record(seconds * 1_000_000, count)
+
+    def merge(self, other):
+        """Add all samples from another histogram with the same layout"""
+        if (other.sub_bucket_bits, other.max_value_us) != (self.sub_bucket_bits, self.max_value_us):
+            raise ValueError("Cannot merge histograms with different layouts")
+        for i, c in enumerate(other.counts):
+            if c:
+                self.counts[i] += c
+        self.total_count += other.total_count
+        self.sum_us += other.sum_us
+        if other.min_us is not None and (self.min_us is None or other.min_us < self.min_us):
+            self.min_us = other.min_us
+        self.max_us = max(self.max_us, other.max_us)
+        return self
+
+    # ---------------------- QUERIES ----------------------
+
+    def percentile(self, p):
+        """Value (µs) at the given percentile, 0 < p <= 100"""
+        if self.total_count == 0:
+            return 0
+        target = max(1, math.ceil(self.total_count * p / 100.0))
+        seen = 0
+        for i, c in enumerate(self.counts):
+            seen += c
+            if seen >= target:
+                return min(self._highest_equivalent(i), self.max_us)
+        return self.max_us
+
+    def mean(self):
+        return self.sum_us / self.total_count if self.total_count else 0.0
+
+    def summary(self, percentiles=(50, 90, 99, 99.9)):
+        """Percentiles, min, max and mean, all in milliseconds"""
+        result = {f"p{p:g}": self.percentile(p) / 1000 for p in percentiles}
+        result["min"] = (self.min_us or 0) / 1000
+        result["max"] = self.max_us / 1000
+        result["mean"] = self.mean() / 1000
+        return result
+
+    # ---------------------- EXPORT ----------------------
+
+    def to_dict(self):
+        """Sparse, JSON-serializable representation"""
+        return {
+            "unit": "us",
+            "max_value_us": self.max_value_us,
+            "sub_bucket_bits": self.sub_bucket_bits,
+            "total_count": self.total_count,
+            "min_us": self.min_us,
+            "max_us": self.max_us,
+            "sum_us": self.sum_us,
+            "counts": {str(i): c for i, c in enumerate(self.counts) if c},
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        hist = cls(data["max_value_us"], data["sub_bucket_bits"])
+        for i, c in data["counts"].items():
+            hist.counts[int(i)] = c
+        hist.total_count = data["total_count"]
+        hist.min_us = data["min_us"]
+        hist.max_us = data["max_us"]
+        hist.sum_us = data["sum_us"]
+        return hist
+
+    def save(self, path):
+        with open(path, "w") as f:
+            json.dump(self.to_dict(), f)
+
+    @classmethod
+    def load(cls, path):
+        with open(path) as f:
+            return cls.from_dict(json.load(f))
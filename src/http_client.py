@@ -0,0 +1,135 @@
+"""
+Tuned aiohttp client for the benchmark.
+- Configurable connection pool (total and per-host limits), keep-alive,
+  TCP_NODELAY, DNS cache TTL and timeouts.
+- Connection reuse statistics (new / reused / queued for a free slot) taken
+  from aiohttp trace hooks, to tell client-side limits from server-side ones.
+"""
+
+import socket
+from dataclasses import dataclass, asdict
+
+import aiohttp
+
+ALB_IDLE_TIMEOUT = 60       # seconds, the ALB default idle timeout
+KEEPALIVE_MARGIN = 5        # close idle sockets before the ALB does, so a reused one is never reset
+
+
+@dataclass
+class ClientConfig:
+    """Connector and timeout settings for the benchmark session"""
+    pool_size: int = 1000           # total connections (aiohttp default: 100)
+    per_host: int = 0               # per (host, port) limit, 0 = no limit
+    keepalive_timeout: float = ALB_IDLE_TIMEOUT - KEEPALIVE_MARGIN   # idle keep-alive (55 s)
+    tcp_nodelay: bool = True
+    dns_ttl: int = 300              # seconds, None caches forever
+    total_timeout: float = 30
+    connect_timeout: float = 5
+    read_timeout: float = 10
+
+    def to_dict(self):
+        return asdict(self)
+
+
+class ConnectionStats:
+    """Counters filled by aiohttp trace hooks"""
+
+    def __init__(self):
+        self.new = 0
+        self.reused = 0
+        self.queued = 0
+
+    def trace_config(self):
+        trace = aiohttp.TraceConfig()
+        trace.on_connection_create_end.append(self._on_new)
+        trace.on_connection_reuseconn.append(self._on_reused)
+        trace.on_connection_queued_start.append(self._on_queued)
+        return trace
+
+    async def _on_new(self, session, ctx, params):
+        self.new += 1
+
+    async def _on_reused(self, session, ctx, params):
+        self.reused += 1
+
+    async def _on_queued(self, session, ctx, params):
+        self.queued += 1
+
+    def merge_report(self, report):
+        """Add the counters of another ConnectionStats.report()"""
+        self.new += report["new"]
+        self.reused += report["reused"]
+        self.queued += report["queued_for_pool"]
+
+    def report(self):
+        total = self.new + self.reused
+        return {
+            "new": self.new,
+            "reused": self.reused,
+            "reuse_ratio": self.reused / total if total else 0.0,
+            "queued_for_pool": self.queued,
+        }
+
+
+class TunedTCPConnector(aiohttp.TCPConnector):
+    """TCPConnector that sets TCP_NODELAY explicitly on every new socket"""
+
+    def __init__(self, *args, tcp_nodelay=True, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._tcp_nodelay = tcp_nodelay
+
+    async def _create_connection(self, req, traces, timeout):
+        proto = await super()._create_connection(req, traces, timeout)
+        transport = proto.transport
+        sock = transport.get_extra_info("socket") if transport is not None else None
+        if sock is not None and sock.family in (socket.AF_INET, socket.AF_INET6):
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, int(self._tcp_nodelay))
+        return proto
+
+
+def create_session(config=None, stats=None):
+    """Build a ClientSession from a ClientConfig, optionally tracing into stats"""
+    config = config or ClientConfig()
+    connector = TunedTCPConnector(
+        limit=config.pool_size,
+        limit_per_host=config.per_host,
+        keepalive_timeout=config.keepalive_timeout,
+        use_dns_cache=True,
+        ttl_dns_cache=config.dns_ttl,
+        tcp_nodelay=config.tcp_nodelay,
+    )
+    timeout = aiohttp.ClientTimeout(
+        total=config.total_timeout,
+        sock_connect=config.connect_timeout,
+        sock_read=config.read_timeout,
+    )
+    trace_configs = [stats.trace_config()] if stats is not None else None
+    return aiohttp.ClientSession(connector=connector, timeout=timeout, trace_configs=trace_configs)
+
+
+def add_client_arguments(parser):
+    """Register ClientConfig options on an argparse parser"""
+    defaults = ClientConfig()
+    group = parser.add_argument_group("HTTP client")
+    group.add_argument("--pool-size", type=int, default=defaults.pool_size, help="Total connection pool size")
+    group.add_argument("--per-host", type=int, default=defaults.per_host, help="Per-host connection limit (0 = none)")
+    group.add_argument("--keepalive", type=float, default=defaults.keepalive_timeout, help="Keep-alive idle timeout (s)")
+    group.add_argument("--no-nodelay", action="store_true", help="Leave Nagle's algorithm enabled")
+    group.add_argument("--dns-ttl", type=int, default=defaults.dns_ttl, help="DNS cache TTL (s)")
+    group.add_argument("--timeout", type=float, default=defaults.total_timeout, help="Total request timeout (s)")
+    group.add_argument("--connect-timeout", type=float, default=defaults.connect_timeout, help="Connect timeout (s)")
+    group.add_argument("--read-timeout", type=float, default=defaults.read_timeout, help="Socket read timeout (s)")
+
+
+def config_from_args(args):
+    """Build a ClientConfig from arguments registered by add_client_arguments"""
+    return ClientConfig(
+        pool_size=args.pool_size,
+        per_host=args.per_host,
+        keepalive_timeout=args.keepalive,
+        tcp_nodelay=not args.no_nodelay,
+        dns_ttl=args.dns_ttl,
+        total_timeout=args.timeout,
+        connect_timeout=args.connect_timeout,
+        read_timeout=args.read_timeout,
+    )
@@ -0,0 +1,99 @@
+"""
+EC2 instance inventory.
+- Tag and state filtering is pushed down to describe_instances (Filters),
+  and every page is read through the paginator.
+- Results go through the describe cache (aws_cache.py), since stages ask for
+  the same inventory repeatedly; callers that wait on state changes pass
+  fresh=True.
+- Instances are returned as compact InstanceRecord objects, indexed by
+  instance type and by state.
+"""
+
+import datetime
+from dataclasses import dataclass, asdict
+
+from aws_cache import get_cache
+
+LAB_TAG = ("Lab", "LAB01")
+# Every state except terminated / shutting-down
+LIVE_STATES = ["pending", "running", "stopping", "stopped"]
+
+
+@dataclass(slots=True, frozen=True)
+class InstanceRecord:
+    instance_id: str
+    instance_type: str
+    state: str
+    az: str
+    public_ip: str = None
+    private_ip: str = None
+    launch_time: datetime.datetime = None
+
+    @classmethod
+    def from_api(cls, instance):
+        return cls(
+            instance_id=instance["InstanceId"],
+            instance_type=instance["InstanceType"],
+            state=instance["State"]["Name"],
+            az=instance["Placement"]["AvailabilityZone"],
+            public_ip=instance.get("PublicIpAddress"),
+            private_ip=instance.get("PrivateIpAddress"),
+            launch_time=instance.get("LaunchTime"),
+        )
+
+    def to_dict(self):
+        return asdict(self)
+
+
+class Inventory:
+    """Instance records with lookups by type and state"""
+
+    def __init__(self, records):
+        self.records = records
+        self.by_type = {}
+        self.by_state = {}
+        for record in records:
+            self.by_type.setdefault(record.instance_type, []).append(record)
+            self.by_state.setdefault(record.state, []).append(record)
+
+    def __len__(self):
+        return len(self.records)
+
+    def __iter__(self):
+        return iter(self.records)
+
+    def ids(self, instance_type=None, state=None):
+        """Instance IDs, optionally restricted to a type and/or a state"""
+        records = self.by_type.get(instance_type, []) if instance_type else self.records
+        return [r.instance_id for r in records if state is None or r.state == state]
+
+    def states(self):
+        """{instance_id: state}"""
+        return {r.instance_id: r.state for r in self.records}
+
+
+def build_filters(tag=LAB_TAG, states=None, instance_types=None):
+    """describe_instances Filters for a tag, states and instance types"""
+    filters = []
+    if tag is not None:
+        filters.append({"Name": f"tag:{tag[0]}", "Values": [tag[1]]})
+    if states:
+        filters.append({"Name": "instance-state-name", "Values": list(states)})
+    if instance_types:
+        filters.append({"Name": "instance-type", "Values": list(instance_types)})
+    return filters
+
+
+def discover_instances(tag=LAB_TAG, states=None, instance_types=None, region=None, fresh=False):
+    """All matching instances across every describe_instances page"""
+    reservations = get_cache().paginate(
+        "ec2", "describe_instances", "Reservations", region=region, fresh=fresh,
+        Filters=build_filters(tag, states, instance_types),
+        PaginationConfig={"PageSize": 1000},
+    )
+    records = [
+        InstanceRecord.from_api(instance)
+        for reservation in reservations
+        for instance in reservation["Instances"]
+    ]
+    return Inventory(records)
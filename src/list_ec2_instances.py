@@ -1,20 +1,17 @@
-import boto3
+from aws_clients import REGION
+from inventory import discover_instances
 
-def list_ec2_instances(region="us-east-1"):
-    ec2 = boto3.client("ec2", region_name=region)
-
-    response = ec2.describe_instances()
-    instances = []
-
-    for reservation in response["Reservations"]:
-        for instance in reservation["Instances"]:
-            instances.append({
-                "InstanceId": instance["InstanceId"],
-                "State": instance["State"]["Name"],
-                "Type": instance["InstanceType"],
-                "AZ": instance["Placement"]["AvailabilityZone"],
-                "PublicIP": instance.get("PublicIpAddress", "N/A")
-            })
+def list_ec2_instances(region=REGION):
+    instances = [
+        {
+            "InstanceId": record.instance_id,
+            "State": record.state,
+            "Type": record.instance_type,
+            "AZ": record.az,
+            "PublicIP": record.public_ip or "N/A"
+        }
+        for record in discover_instances(tag=None, region=region)
+    ]
 
     if not instances:
         print("No EC2 instances found in region", region)
@@ -24,4 +21,4 @@ def list_ec2_instances(region="us-east-1"):
             print(inst)
 
 if __name__ == "__main__":
-    list_ec2_instances("us-east-1")  # change region if needed
+    list_ec2_instances()  # set AWS_REGION to use another region
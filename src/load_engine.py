@@ -0,0 +1,84 @@
+"""
+Load generation engine for benchmark.py.
+- Closed loop: N workers, each sends its next request as soon as the
+  previous one completes.
+- Open loop: requests are issued on a fixed schedule (target RPS). Latency is
+  measured from the *intended* send time, so a stalled server is charged for
+  the requests it delayed (coordinated omission correction).
+Requests are produced lazily: at most `concurrency` / `max_in_flight`
+coroutines exist at any time, whatever the total number of requests.
+"""
+
+import asyncio
+import itertools
+import time
+
+
+def constant_rate_schedule(rate, num_requests):
+    """Yield intended send offsets (seconds from start) for a fixed RPS"""
+    interval = 1.0 / rate
+    for i in range(num_requests):
+        yield i * interval
+
+
+def interleave(schedule, index, parts):
+    """
+    Items index, index + parts, index + 2*parts, ... of a schedule: the share
+    of one of `parts` generators splitting a single arrival stream, so their
+    combined sends keep its spacing instead of firing in lockstep.
+    """
+    return itertools.islice(schedule, index, None, parts)
+
+
+async def run_closed_loop(request_fn, num_requests, concurrency=100):
+    """
+    Run `num_requests` calls of `request_fn(request_num, intended_start)`
+    with `concurrency` workers pulling from a shared counter.
+    """
+    counter = itertools.count()
+
+    async def worker():
+        for request_num in counter:
+            if request_num >= num_requests:
+                return
+            await request_fn(request_num, None)
+
+    workers = min(concurrency, num_requests)
+    await asyncio.gather(*(worker() for _ in range(workers)))
+
+
+async def run_open_loop(request_fn, schedule, max_in_flight=10000):
+    """
+    Issue one `request_fn(request_num, intended_start)` per offset yielded by
+    `schedule`. `intended_start` is a time.perf_counter() timestamp.
+    Schedule items may also be `(offset, *context)` tuples, in which case the
+    context is passed on: `request_fn(request_num, intended_start, *context)`.
+    If `max_in_flight` requests are outstanding the scheduler waits, but the
+    intended start times are kept so the delay shows up in the latencies.
+    """
+    slots = asyncio.Semaphore(max_in_flight)
+    pending = set()
+
+    async def run_one(request_num, intended_start, context):
+        try:
+            await request_fn(request_num, intended_start, *context)
+        finally:
+            slots.release()
+
+    start = time.perf_counter()
+    for request_num, item in enumerate(schedule):
+        if isinstance(item, tuple):
+            offset, context = item[0], item[1:]
+        else:
+            offset, context = item, ()
+        intended_start = start + offset
+        delay = intended_start - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        await slots.acquire()
+        task = asyncio.create_task(run_one(request_num, intended_start, context))
+        pending.add(task)
+        task.add_done_callback(pending.discard)
+
+    if pending:
+        await asyncio.gather(*pending)
@@ -1,49 +1,185 @@
+#!/usr/bin/env python3
+"""
+Infrastructure pipeline, split into stages that can run on their own:
+
+    python src/main.py provision   # security group + EC2 instances
+    python src/main.py alb         # load balancer, target groups, listener
+    python src/main.py bench       # wait for healthy targets, run the benchmark
+    python src/main.py metrics     # wait for and fetch CloudWatch metrics
+    python src/main.py plot        # render the fetched metrics
+    python src/main.py all         # every stage in order (default)
+
+Every stage, wait and AWS API call is traced: the run ends with a summary of
+stage wall time and per-API latency/retries, and the spans are written to
+pipeline_trace.json (Chrome trace format; `--trace run.jsonl` for JSON lines).
+
+Each stage imports only the modules it needs, so `--help` or a single stage
+does not pay for pandas/matplotlib or for AWS clients it never uses.
+"""
+
+import argparse
 import asyncio
+import datetime
+import json
 import sys
-import time
-from setup import create_security_group, setup
-from create_alb import main as create_alb
-from benchmark import main as run_benchmark
-from cloudwatch import main as fetch_metrics
-from visualize import plot_metrics_from_data
-
-async def main():
+
+from tracing import TRACE_PATH, get_tracer, print_summary, span
+
+BENCH_WINDOW_FILE = "bench_window.json"
+BOOT_TIMES_FILE = "boot_times.json"
+METRICS_FILE = "metrics_data.json"
+
+
+def stage_provision(state):
+    from setup import create_security_group, setup
+    print("\n--- Creating Security Group and Instances ---")
+    create_security_group()
+    setup()  # builds and publishes the server artifact if instances are launched
+    print("Security Group and Instances created.")
+
+
+def stage_alb(state):
+    from create_alb import main as create_alb
+    print("\n--- Creating Application Load Balancer ---")
+    create_alb()
+    print("Application Load Balancer created.")
+
+
+async def stage_bench(state):
+    from benchmark import main as run_benchmark
+    from cloudwatch import load_alb_info
+    from readiness import wait_until_ready
+
+    print("\n--- Waiting for targets and endpoints to be ready ---")
+    with span("wait_until_ready"):
+        boot_times = await wait_until_ready(load_alb_info())
+    if boot_times:
+        with open(BOOT_TIMES_FILE, "w") as f:
+            json.dump(boot_times, f, indent=2)
+        state["boot_times"] = boot_times
+
+    print("\n--- Running Benchmark ---")
+    bench_start = datetime.datetime.utcnow()
+    with span("benchmark"):
+        results = await run_benchmark()
+    bench_end = datetime.datetime.utcnow()
+    print("Benchmark completed.")
+
+    window = {
+        "start": bench_start.isoformat(),
+        "end": bench_end.isoformat(),
+        "requests": sum(stats.histogram.total_count for stats in results.values()),
+    }
+    with open(BENCH_WINDOW_FILE, "w") as f:
+        json.dump(window, f)
+    state["bench_window"] = window
+
+
+async def stage_metrics(state):
+    from cloudwatch import load_alb_info, main as fetch_metrics
+    from readiness import wait_for_metrics
+
+    window = state.get("bench_window")
+    if window is None:
+        try:
+            with open(BENCH_WINDOW_FILE) as f:
+                window = json.load(f)
+        except FileNotFoundError:
+            window = None
+
+    if window is not None:
+        print("\n--- Waiting for CloudWatch metrics to populate ---")
+        alb_info = load_alb_info()
+        with span("wait_for_metrics"):
+            await asyncio.to_thread(
+                wait_for_metrics,
+                alb_info["LoadBalancerFullName"],
+                datetime.datetime.fromisoformat(window["start"]),
+                datetime.datetime.fromisoformat(window["end"]),
+                window["requests"],
+            )
+        print("Wait finished.")
+
+    print("\n--- Getting CloudWatch Metrics ---")
+    with span("fetch_metrics"):
+        metrics_data = await asyncio.to_thread(fetch_metrics)
+    with open(METRICS_FILE, "w") as f:
+        json.dump(metrics_data, f, default=str)
+    state["metrics_data"] = metrics_data
+    print("Metrics fetched.")
+
+
+def stage_plot(state):
+    from visualize import plot_metrics_from_data
+    metrics_data = state.get("metrics_data")
+    if metrics_data is None:
+        with open(METRICS_FILE) as f:
+            metrics_data = json.load(f)
+
+    print("\n--- Visualizing Metrics ---")
+    plot_metrics_from_data(metrics_data)
+    print("Visualization complete. Plots saved in 'plots/' directory.")
+
+
+STAGES = {
+    "provision": stage_provision,
+    "alb": stage_alb,
+    "bench": stage_bench,
+    "metrics": stage_metrics,
+    "plot": stage_plot,
+}
+
+
+def print_describe_cache_stats():
+    """Hit/miss counts of the AWS describe cache, if a stage used it"""
+    aws_cache = sys.modules.get("aws_cache")
+    if aws_cache is None or aws_cache._cache is None:
+        return
+    stats = aws_cache.get_cache().stats()
+    print(f"🗄️ AWS describe cache: {stats['hits']} hits, {stats['misses']} misses")
+    for operation, counts in stats["by_operation"].items():
+        print(f"   {operation}: {counts['hits']} hits, {counts['misses']} misses")
+
+
+def finish_trace(tracer, trace_path):
+    print_summary(tracer.summary())
+    print_describe_cache_stats()
+    if trace_path:
+        print(f"🧭 Trace saved in {tracer.write(trace_path)}")
+
+
+async def main(stages=None, trace_path=TRACE_PATH):
     """
     Pipeline principal que ejecuta todos los pasos de la infraestructura
     de forma secuencial, importando las funciones necesarias.
     """
+    tracer = get_tracer()
+    tracer.instrument_aws()
+    state = {}
     try:
-        print("\n--- Creating Security Group and Instances ---")
-        create_security_group()
-        setup()
-        print("Security Group and Instances created.")
-
-        print("\n--- Creating Application Load Balancer ---")
-        create_alb()
-        print("Application Load Balancer created.")
-
-        print("\n--- Running Benchmark ---")
-        time.sleep(180)
-        await run_benchmark()
-        print("Benchmark completed.")
-
-        print("\n--- Waiting for CloudWatch metrics to populate (2 minutes) ---")
-        time.sleep(120)
-        print("Wait finished.")
-        
-        print("\n--- Getting CloudWatch Metrics ---")
-        metrics_data = fetch_metrics()
-        print("Metrics fetched.")
-
-        print("\n--- Visualizing Metrics ---")
-        plot_metrics_from_data(metrics_data)
-        print("Visualization complete. Plots saved in 'plots/' directory.")
+        for name in stages or STAGES:
+            with tracer.span(name, cat="stage"):
+                result = STAGES[name](state)
+                if asyncio.iscoroutine(result):
+                    await result
 
         print("\nPipeline completed successfully!")
+        finish_trace(tracer, trace_path)
     except Exception as e:
         print(f"\nPipeline failed: {e}")
+        finish_trace(tracer, trace_path)
         sys.exit(1)
 
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="LAB01 infrastructure and benchmark pipeline")
+    parser.add_argument("stage", nargs="?", default="all", choices=[*STAGES, "all"],
+                        help="Stage to run (default: all)")
+    parser.add_argument("--trace", default=TRACE_PATH,
+                        help="Trace file: Chrome trace JSON, or JSON lines if it ends in .jsonl ('' to skip)")
+    return parser.parse_args(argv)
+
+
 if __name__ == "__main__":
-   
-    asyncio.run(main())
+    args = parse_args()
+    asyncio.run(main(None if args.stage == "all" else [args.stage], args.trace))
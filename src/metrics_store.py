@@ -0,0 +1,170 @@
+"""
+Local SQLite time-series store for CloudWatch metrics.
+- Series are keyed by (namespace, metric, dimensions, stat, period).
+- A fetch only asks CloudWatch for the gap since the previous fetch (plus a
+  few periods of overlap, since ALB datapoints can be revised for a few
+  minutes after publication); everything else is served from disk.
+- Points older than the retention window are evicted on every fetch.
+"""
+
+import datetime
+import json
+import sqlite3
+import time
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS series (
+    id INTEGER PRIMARY KEY,
+    namespace TEXT NOT NULL,
+    metric TEXT NOT NULL,
+    dimensions TEXT NOT NULL,
+    stat TEXT NOT NULL,
+    period INTEGER NOT NULL,
+    fetched_from INTEGER,
+    fetched_until INTEGER,
+    last_fetch_at REAL,
+    UNIQUE (namespace, metric, dimensions, stat, period)
+);
+CREATE TABLE IF NOT EXISTS points (
+    series_id INTEGER NOT NULL,
+    ts INTEGER NOT NULL,
+    value REAL NOT NULL,
+    PRIMARY KEY (series_id, ts)
+) WITHOUT ROWID;
+"""
+
+
+def to_epoch(dt):
+    """Epoch seconds of a datetime (naive datetimes are taken as UTC)"""
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=datetime.timezone.utc)
+    return int(dt.timestamp())
+
+
+def from_epoch(ts):
+    return datetime.datetime.fromtimestamp(ts, tz=datetime.timezone.utc)
+
+
+def series_key(query):
+    """(namespace, metric, dimensions, stat, period) of a MetricDataQuery"""
+    stat = query["MetricStat"]
+    metric = stat["Metric"]
+    dimensions = sorted((d["Name"], d["Value"]) for d in metric.get("Dimensions", []))
+    return (metric["Namespace"], metric["MetricName"], json.dumps(dimensions), stat["Stat"], stat["Period"])
+
+
+class MetricsStore:
+    """Read-through cache of CloudWatch series on disk"""
+
+    def __init__(self, path="metrics_cache.sqlite", retention_days=15, overlap_periods=5, min_refresh=60):
+        self.db = sqlite3.connect(path)
+        self.db.executescript(SCHEMA)
+        self.retention = retention_days * 86400
+        self.overlap_periods = overlap_periods
+        self.min_refresh = min_refresh      # seconds during which a fresh series is not re-fetched
+        self.fetches = 0
+        self.fetched_points = 0
+        self.cached_points = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.db.close()
+
+    # ---------------------- SERIES ----------------------
+
+    def _series(self, key):
+        """Row (id, fetched_from, fetched_until, last_fetch_at) for a key, created if needed"""
+        self.db.execute(
+            "INSERT OR IGNORE INTO series (namespace, metric, dimensions, stat, period) VALUES (?, ?, ?, ?, ?)",
+            key,
+        )
+        return self.db.execute(
+            "SELECT id, fetched_from, fetched_until, last_fetch_at FROM series "
+            "WHERE namespace = ? AND metric = ? AND dimensions = ? AND stat = ? AND period = ?",
+            key,
+        ).fetchone()
+
+    def _gap_start(self, row, period, start, end, now):
+        """Epoch from which a series must be fetched, or None if it is up to date"""
+        _, fetched_from, fetched_until, last_fetch_at = row
+        if fetched_from is None or start < fetched_from:
+            return start
+        if last_fetch_at is not None and now - last_fetch_at < self.min_refresh and fetched_until >= end - period:
+            return None
+        return max(start, fetched_until - self.overlap_periods * period)
+
+    # ---------------------- FETCH ----------------------
+
+    def evict(self, now=None):
+        """Drop points older than the retention window"""
+        cutoff = int((now or time.time()) - self.retention)
+        self.db.execute("DELETE FROM points WHERE ts < ?", (cutoff,))
+        self.db.execute("UPDATE series SET fetched_from = ? WHERE fetched_from < ?", (cutoff, cutoff))
+        self.db.commit()
+
+    def fetch(self, queries, id_map, fetch_fn, minutes=60, end=None):
+        """
+        Return metrics_data for the last `minutes`, calling
+        `fetch_fn(queries, start, end) -> {query_id: (timestamps, values)}`
+        only for the missing part of each series. Queries needing the same
+        gap are fetched together. Series missing from fetch_fn's result
+        (failed calls) keep their previous fetch window, so the gap is
+        requested again on the next fetch.
+        """
+        now = time.time()
+        end = end or datetime.datetime.utcnow()
+        start = end - datetime.timedelta(minutes=minutes)
+        start_ts, end_ts = to_epoch(start), to_epoch(end)
+        self.evict(now)
+
+        series_ids = {}
+        groups = {}
+        for query in queries:
+            key = series_key(query)
+            row = self._series(key)
+            series_ids[query["Id"]] = row[0]
+            period = key[-1]
+            gap_start = self._gap_start(row, period, start_ts, end_ts, now)
+            if gap_start is not None:
+                groups.setdefault(gap_start - gap_start % period, []).append(query)
+
+        fetched_now = 0
+        for gap_start, group in groups.items():
+            series = fetch_fn(group, from_epoch(gap_start), end)
+            self.fetches += 1
+            for query in group:
+                if query["Id"] not in series:
+                    continue
+                series_id = series_ids[query["Id"]]
+                timestamps, values = series[query["Id"]]
+                self.db.executemany(
+                    "INSERT OR REPLACE INTO points (series_id, ts, value) VALUES (?, ?, ?)",
+                    [(series_id, to_epoch(ts), value) for ts, value in zip(timestamps, values)],
+                )
+                fetched_now += len(timestamps)
+                self.db.execute(
+                    "UPDATE series SET fetched_from = MIN(COALESCE(fetched_from, ?), ?), "
+                    "fetched_until = ?, last_fetch_at = ? WHERE id = ?",
+                    (gap_start, gap_start, end_ts, now, series_id),
+                )
+        self.db.commit()
+
+        metrics_data = {}
+        returned = 0
+        for query_id, (label, metric_name, stat) in id_map.items():
+            rows = self.db.execute(
+                "SELECT ts, value FROM points WHERE series_id = ? AND ts BETWEEN ? AND ? ORDER BY ts",
+                (series_ids[query_id], start_ts, end_ts),
+            ).fetchall()
+            returned += len(rows)
+            metrics_data.setdefault(label, {})[metric_name] = [
+                {"Timestamp": from_epoch(ts), stat: value} for ts, value in rows
+            ]
+        self.fetched_points += fetched_now
+        self.cached_points += max(0, returned - fetched_now)
+        return metrics_data
@@ -0,0 +1,184 @@
+"""
+Readiness polling for the pipeline, replacing fixed sleeps.
+- Targets: poll describe_target_health until every registered target of
+  every target group is healthy, noting when each one turned healthy so
+  the pipeline can report boot-to-healthy time per instance.
+- Endpoints: poll the app's /cluster1 and /cluster2 through the ALB with
+  exponential backoff until each answers 200.
+- Metrics: poll CloudWatch until the ALB RequestCount datapoints covering
+  the benchmark window are published.
+"""
+
+import asyncio
+import datetime
+import time
+
+import aiohttp
+
+from aws_clients import REGION, get_client
+
+
+def elbv2():
+    return get_client("elbv2", REGION)
+
+
+def cloudwatch():
+    return get_client("cloudwatch", REGION)
+
+
+def backoff_delays(initial=1.0, factor=2.0, maximum=15.0):
+    """Infinite sequence of exponentially growing, capped delays"""
+    delay = initial
+    while True:
+        yield delay
+        delay = min(delay * factor, maximum)
+
+
+def target_states(tg_arn):
+    """{instance_id: state} for every target registered in a target group"""
+    response = elbv2().describe_target_health(TargetGroupArn=tg_arn)
+    return {
+        desc["Target"]["Id"]: desc["TargetHealth"]["State"]
+        for desc in response["TargetHealthDescriptions"]
+    }
+
+
+def wait_for_healthy_targets(tg_arns, timeout=600, interval=5):
+    """
+    Block until every target of every target group is healthy.
+    Returns {instance_id: UTC datetime first seen healthy}, None for targets
+    that were already healthy at the first poll.
+    """
+    deadline = time.monotonic() + timeout
+    healthy_at = {}
+    first_poll = True
+    while True:
+        states = {tg_arn: target_states(tg_arn) for tg_arn in tg_arns}
+        now = datetime.datetime.now(datetime.timezone.utc)
+        for tg_states in states.values():
+            for iid, state in tg_states.items():
+                if state == "healthy" and iid not in healthy_at:
+                    healthy_at[iid] = None if first_poll else now
+        first_poll = False
+        not_ready = {
+            tg_arn.split("/")[-2]: {iid: state for iid, state in tg_states.items() if state != "healthy"}
+            for tg_arn, tg_states in states.items()
+            if not tg_states or any(state != "healthy" for state in tg_states.values())
+        }
+        if not not_ready:
+            healthy = sum(len(tg_states) for tg_states in states.values())
+            print(f"✅ All {healthy} targets are healthy")
+            return healthy_at
+        if time.monotonic() > deadline:
+            raise TimeoutError(f"Targets not healthy after {timeout}s: {not_ready}")
+        print(f"   Waiting for targets: {not_ready}")
+        time.sleep(interval)
+
+
+async def wait_for_endpoints(urls, timeout=300):
+    """Wait until each URL answers 200, retrying with exponential backoff"""
+    deadline = time.monotonic() + timeout
+    pending = list(urls)
+    delays = backoff_delays()
+    client_timeout = aiohttp.ClientTimeout(total=5)
+    async with aiohttp.ClientSession(timeout=client_timeout) as session:
+        while pending:
+            for url in list(pending):
+                try:
+                    async with session.get(url) as response:
+                        if response.status == 200:
+                            pending.remove(url)
+                            print(f"✅ {url} is serving")
+                except (aiohttp.ClientError, asyncio.TimeoutError):
+                    pass
+            if not pending:
+                return
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"Endpoints not ready after {timeout}s: {pending}")
+            await asyncio.sleep(next(delays))
+
+
+def request_count_datapoints(lb_fullname, start, end):
+    """ALB RequestCount (Sum, 60s) datapoints between start and end"""
+    response = cloudwatch().get_metric_data(
+        MetricDataQueries=[{
+            "Id": "requests",
+            "MetricStat": {
+                "Metric": {
+                    "Namespace": "AWS/ApplicationELB",
+                    "MetricName": "RequestCount",
+                    "Dimensions": [{"Name": "LoadBalancer", "Value": lb_fullname}],
+                },
+                "Period": 60,
+                "Stat": "Sum",
+            },
+        }],
+        StartTime=start,
+        EndTime=end + datetime.timedelta(minutes=1),
+        ScanBy="TimestampAscending",
+    )
+    results = response.get("MetricDataResults", [])
+    if not results:
+        return [], []
+    return results[0].get("Timestamps", []), results[0].get("Values", [])
+
+
+def wait_for_metrics(lb_fullname, start, end, expected_requests=None, timeout=600, interval=15):
+    """
+    Block until CloudWatch has published RequestCount for the minute in which
+    the benchmark ended (and, if given, at least `expected_requests` in total).
+    `start` and `end` are naive UTC datetimes.
+    """
+    last_minute = end.replace(second=0, microsecond=0, tzinfo=datetime.timezone.utc)
+    deadline = time.monotonic() + timeout
+    while True:
+        timestamps, values = request_count_datapoints(lb_fullname, start, end)
+        covered = bool(timestamps) and max(timestamps) >= last_minute
+        enough = expected_requests is None or sum(values) >= expected_requests
+        if covered and enough:
+            print(f"✅ CloudWatch reports {int(sum(values))} requests for the benchmark window")
+            return
+        if time.monotonic() > deadline:
+            print(f"⚠️ Metrics still incomplete after {timeout}s, continuing with what is available")
+            return
+        print(f"   Waiting for metrics: {int(sum(values))} requests published so far")
+        time.sleep(interval)
+
+
+def boot_to_healthy(healthy_at, launch_times):
+    """{instance_id: seconds from launch to healthy}, for targets seen turning healthy"""
+    return {
+        iid: (at - launch_times[iid]).total_seconds()
+        for iid, at in healthy_at.items()
+        if at is not None and launch_times.get(iid) is not None
+    }
+
+
+def print_boot_times(boot_times, already_healthy=0):
+    if boot_times:
+        values = sorted(boot_times.values())
+        print(
+            f"🥾 Boot to healthy ({len(values)} instances): min {values[0]:.0f}s, "
+            f"median {values[len(values) // 2]:.0f}s, max {values[-1]:.0f}s"
+        )
+    if already_healthy:
+        print(f"   {already_healthy} targets were already healthy when polling started")
+
+
+async def wait_until_ready(alb_info, timeout=600):
+    """
+    Wait for healthy targets, then for the app endpoints behind the ALB.
+    Returns the boot-to-healthy seconds of every instance that became
+    healthy meanwhile (precision: the polling interval).
+    """
+    from inventory import discover_instances
+
+    tg_arns = [alb_info["TargetGroup1"], alb_info["TargetGroup2"]]
+    healthy_at = await asyncio.to_thread(wait_for_healthy_targets, tg_arns, timeout)
+    launch_times = {r.instance_id: r.launch_time for r in discover_instances(states=["running"], fresh=True)}
+    boot_times = boot_to_healthy(healthy_at, launch_times)
+    print_boot_times(boot_times, sum(at is None for at in healthy_at.values()))
+
+    base_url = f"http://{alb_info['DNSName']}"
+    await wait_for_endpoints([f"{base_url}/cluster1", f"{base_url}/cluster2"], timeout)
+    return boot_times
@@ -0,0 +1,157 @@
+"""
+Server-side latency from the app's /metrics endpoint.
+- Scrapes one or more Prometheus endpoints, each instance directly, and
+  sums them. Load balancer URLs are rejected: the scrapes before and after
+  a run could reach different instances, making their difference meaningless.
+- The difference of a scrape before and after a run isolates that run's
+  requests; percentiles are interpolated within histogram buckets like
+  PromQL's histogram_quantile.
+"""
+
+import asyncio
+import math
+from urllib.parse import urlsplit
+
+import aiohttp
+
+BUCKET_METRIC = "app_request_duration_seconds_bucket"
+SUM_METRIC = "app_request_duration_seconds_sum"
+REQUESTS_METRIC = "app_requests_total"
+# Workers refresh their shared snapshot every second: wait that long after a
+# run so the scrape includes requests served by the other workers
+SETTLE_SECONDS = 1.5
+INSTANCE_PORT = 8000   # user_data/server.sh
+
+
+def parse_labels(text):
+    """'route="/a",le="0.1"' -> {"route": "/a", "le": "0.1"}"""
+    labels = {}
+    for part in text.split(","):
+        if "=" in part:
+            key, value = part.split("=", 1)
+            labels[key.strip()] = value.strip().strip('"')
+    return labels
+
+
+def parse_prometheus(text):
+    """{route: {"buckets": {le: cumulative}, "sum": s, "statuses": {status: n}}}"""
+    routes = {}
+    for line in text.splitlines():
+        if not line or line.startswith("#") or "{" not in line:
+            continue
+        name, rest = line.split("{", 1)
+        label_text, value = rest.rsplit("}", 1)
+        labels = parse_labels(label_text)
+        if "route" not in labels:
+            continue
+        route = routes.setdefault(labels["route"], {"buckets": {}, "sum": 0.0, "statuses": {}})
+        value = float(value)
+        if name == BUCKET_METRIC:
+            le = math.inf if labels["le"] == "+Inf" else float(labels["le"])
+            route["buckets"][le] = route["buckets"].get(le, 0) + value
+        elif name == SUM_METRIC:
+            route["sum"] += value
+        elif name == REQUESTS_METRIC:
+            route["statuses"][labels["status"]] = route["statuses"].get(labels["status"], 0) + value
+    return routes
+
+
+def merge_scrapes(scrapes):
+    """Sum parsed scrapes of several servers"""
+    merged = {}
+    for routes in scrapes:
+        for name, data in routes.items():
+            route = merged.setdefault(name, {"buckets": {}, "sum": 0.0, "statuses": {}})
+            for le, count in data["buckets"].items():
+                route["buckets"][le] = route["buckets"].get(le, 0) + count
+            route["sum"] += data["sum"]
+            for status, count in data["statuses"].items():
+                route["statuses"][status] = route["statuses"].get(status, 0) + count
+    return merged
+
+
+def diff_scrapes(before, after):
+    """Counters accumulated between two parsed scrapes"""
+    delta = {}
+    for name, data in after.items():
+        previous = before.get(name, {"buckets": {}, "sum": 0.0, "statuses": {}})
+        delta[name] = {
+            "buckets": {le: count - previous["buckets"].get(le, 0) for le, count in data["buckets"].items()},
+            "sum": data["sum"] - previous["sum"],
+            "statuses": {s: n - previous["statuses"].get(s, 0) for s, n in data["statuses"].items()},
+        }
+    return delta
+
+
+def histogram_quantile(q, buckets):
+    """Quantile (seconds) from {le: cumulative count}, interpolating linearly inside a bucket"""
+    bounds = sorted(buckets)
+    total = buckets[bounds[-1]] if bounds else 0
+    if total <= 0:
+        return 0.0
+    rank = q * total
+    lower, previous = 0.0, 0
+    for le in bounds:
+        count = buckets[le]
+        if count >= rank:
+            if math.isinf(le):
+                return lower
+            if count == previous:
+                return le
+            return lower + (le - lower) * (rank - previous) / (count - previous)
+        lower, previous = le, count
+    return lower
+
+
+def server_side_report(before, after, percentiles=(50, 90, 99)):
+    """{route: {"requests", "p50", ..., "mean"}} in milliseconds for the requests between two scrapes"""
+    report = {}
+    for route, data in sorted(diff_scrapes(before, after).items()):
+        count = data["buckets"].get(math.inf, 0)
+        if count <= 0:
+            continue
+        entry = {"requests": int(count), "statuses": {s: int(n) for s, n in data["statuses"].items() if n}}
+        for p in percentiles:
+            entry[f"p{p:g}"] = histogram_quantile(p / 100, data["buckets"]) * 1000
+        entry["mean"] = data["sum"] / count * 1000
+        report[route] = entry
+    return report
+
+
+def instance_metrics_urls(port=INSTANCE_PORT):
+    """/metrics URL of every running LAB01 instance, from the EC2 inventory"""
+    from inventory import discover_instances
+    records = discover_instances(states=["running"], fresh=True)
+    return [f"http://{r.public_ip}:{port}/metrics" for r in records if r.public_ip]
+
+
+def check_instance_urls(urls):
+    """Raise ValueError for URLs that go through an AWS load balancer"""
+    behind_alb = [url for url in urls if (urlsplit(url).hostname or "").endswith(".elb.amazonaws.com")]
+    if behind_alb:
+        raise ValueError(f"{', '.join(behind_alb)} goes through the load balancer; "
+                         "pass the instance URLs (or omit them to scrape every running instance)")
+    if not urls:
+        raise ValueError("No /metrics URL to scrape (no running instance with a public IP)")
+    return urls
+
+
+async def scrape(urls, settle=0.0):
+    """Parsed and summed /metrics of every URL, optionally after waiting `settle` seconds"""
+    if settle:
+        await asyncio.sleep(settle)
+    async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=10)) as session:
+        scrapes = []
+        for url in urls:
+            async with session.get(url) as response:
+                response.raise_for_status()
+                scrapes.append(parse_prometheus(await response.text()))
+    return merge_scrapes(scrapes)
+
+
+def print_server_report(report):
+    print("\n🖥️ Server-side latency (from /metrics)")
+    print(f"{'route':<20} {'requests':>9} {'p50 ms':>9} {'p90 ms':>9} {'p99 ms':>9} {'mean ms':>9}")
+    for route, entry in report.items():
+        print(f"{route:<20} {entry['requests']:>9} {entry['p50']:>9.2f} {entry['p90']:>9.2f} "
+              f"{entry['p99']:>9.2f} {entry['mean']:>9.2f}")
@@ -1,29 +1,37 @@
-import boto3
+import os
+
 from botocore.exceptions import ClientError
+from aws_clients import REGION, get_client, get_resource
+from aws_cache import get_cache
+from inventory import LIVE_STATES, discover_instances
 
 # Resource is a high-level API
 # Client is a low-level API
-region = "us-east-1"
-ec2_resource = boto3.resource("ec2", region_name=region)
-ec2_client = boto3.client("ec2", region_name=region)
+region = REGION
 sg_name = "lab01-security-group"
+VPC_ID = "vpc-08afba995b983b2c4"
 
-def get_existing_instances():
-    response = ec2_client.describe_instances()
-    lab_instance_tag = {"Key": "Lab", "Value": "LAB01"}
-    
-    instances = {}
-    for reservation in response["Reservations"]:
-        for instance in reservation["Instances"]:
-            if "Tags" in instance.keys() and lab_instance_tag in instance["Tags"]:
-                instances[instance["InstanceId"]] = instance["State"]["Name"]
+# Amazon Linux 2023, whose system python3 (3.9) runs the prebaked server
+# artifact; src/artifact.py builds for AMI_PYTHON. AMI_ID overrides the image
+# (set ARTIFACT_PYTHON to that image's python3 version too).
+AMI_PARAMETER = "/aws/service/ami-amazon-linux-latest/al2023-ami-kernel-default-x86_64"
+AMI_PYTHON = "3.9"
+
+def ec2_resource():
+    return get_resource("ec2", region)
 
-    return instances
+def ec2_client():
+    return get_client("ec2", region)
+
+def get_existing_instances():
+    """{instance_id: state} of LAB01 instances that are not terminated"""
+    return discover_instances(states=LIVE_STATES, region=region).states()
 
 def security_group_exists(sg_name):
     exists = False
     try:
-        response = ec2_client.describe_security_groups(
+        response = get_cache().call(
+            "ec2", "describe_security_groups", region=region,
             Filters=[{"Name": "group-name", "Values": [sg_name]}]
         )
         if len(response["SecurityGroups"]) != 0:
@@ -33,15 +41,23 @@ def security_group_exists(sg_name):
     
     return exists
 
+def security_group_id(sg_name):
+    """GroupId of a security group, which run_instances needs (not its name)"""
+    response = get_cache().call(
+        "ec2", "describe_security_groups", region=region,
+        Filters=[{"Name": "group-name", "Values": [sg_name]}]
+    )
+    return response["SecurityGroups"][0]["GroupId"]
+
 def create_security_group():
-    vpc_id = "vpc-08afba995b983b2c4"
+    vpc_id = VPC_ID
     
     # Check if the security group already already exists before creating it
     if security_group_exists(sg_name):
         return
 
     # Create security group  
-    security_group = ec2_client.create_security_group(
+    security_group = ec2_client().create_security_group(
         GroupName=sg_name,
         Description="Security group for lab01 in LOG8415E",
         VpcId=vpc_id
@@ -49,12 +65,12 @@ def create_security_group():
     print("Security group creation started. Security group id: ", security_group["GroupId"])
 
     # Wait for security group to be created before adding rules
-    group_waiter = ec2_client.get_waiter('security_group_exists')
+    group_waiter = ec2_client().get_waiter('security_group_exists')
     group_waiter.wait(GroupNames=[sg_name])
     print("Security group creation finished")
 
     # Add inbound rules
-    ec2_client.authorize_security_group_ingress(
+    ec2_client().authorize_security_group_ingress(
         GroupName=sg_name,
         GroupId=security_group["GroupId"],
         IpPermissions=[
@@ -88,7 +104,7 @@ def start_not_running_instances(instances):
     if len(instances_to_start) > 0:
         try:
             print("Starting instances...")
-            response = ec2_client.start_instances(InstanceIds=instances_to_start, DryRun=False)
+            response = ec2_client().start_instances(InstanceIds=instances_to_start, DryRun=False)
             print(response)
         except ClientError as e:
             print(e)
@@ -96,14 +112,22 @@ def start_not_running_instances(instances):
         print("Instances already running.")
 
 
-def create_instance(instance_type: str, setup_script):
-    instances = ec2_resource.create_instances(
-        ImageId="ami-00ca32bbc84273381",   # Amazon Linux 2 AMI (for us-east-1)
-        MinCount=1,
-        MaxCount=1,
+def resolve_ami():
+    """AMI_ID if set, else the latest Amazon Linux 2023 image of the region"""
+    ami_id = os.environ.get("AMI_ID")
+    if ami_id:
+        return ami_id
+    return get_cache().call("ssm", "get_parameter", region=region, Name=AMI_PARAMETER)["Parameter"]["Value"]
+
+def create_instances(instance_type: str, setup_script, count=1):
+    """Launch `count` instances of a type in one request, without waiting"""
+    instances = ec2_resource().create_instances(
+        ImageId=resolve_ami(),
+        MinCount=count,
+        MaxCount=count,
         InstanceType=instance_type,
         KeyName="LOG8415_key",
-        SecurityGroupIds=[sg_name],
+        SecurityGroupIds=[security_group_id(sg_name)],
         UserData=setup_script,
         TagSpecifications=[
             {
@@ -112,22 +136,38 @@ def create_instance(instance_type: str, setup_script):
             }
         ]
     )
+    return [instance.id for instance in instances]
+
+def wait_until_running(instance_ids):
+    """Wait on all instances at once with a single instance_running waiter"""
+    waiter = ec2_client().get_waiter("instance_running")
+    waiter.wait(InstanceIds=instance_ids, WaiterConfig={"Delay": 5, "MaxAttempts": 120})
+    response = ec2_client().describe_instances(InstanceIds=instance_ids)
+    for reservation in response["Reservations"]:
+        for instance in reservation["Instances"]:
+            print(
+                f"Instance {instance['InstanceId']} ({instance['InstanceType']}) is running "
+                f"at Public IP: {instance.get('PublicIpAddress', 'N/A')}"
+            )
+
+USER_DATA_TEMPLATE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                  "user_data", "server.sh")
 
-    instance = instances[0]
-    instance.wait_until_running()
-    instance.reload()
-    print("Instance is running at Public IP:", instance.public_ip_address)
+def render_user_data(cluster_name, artifact_url, template=USER_DATA_TEMPLATE):
+    """Boot script that downloads the prebaked server artifact and starts it"""
+    with open(template) as f:
+        script = f.read()
+    return script.replace("__CLUSTER_NAME__", cluster_name).replace("__ARTIFACT_URL__", artifact_url)
 
-def setup():
-    # TODO: error requesting to cluster2 
+def setup(artifact_url=None):
     instances_config = [
         {
             "type": "t2.large",
-            "setup_script": "user_data/cluster1.sh", 
+            "cluster": "cluster1",
         },
         {
             "type": "t2.micro",
-            "setup_script": "user_data/cluster2.sh", 
+            "cluster": "cluster2",
         }
     ]
     n_instances_by_type = 4
@@ -138,11 +178,16 @@ def setup():
         # TODO: to be tested
         start_not_running_instances(instances)
     elif len(instances) == 0:
-        # Create instances
+        if artifact_url is None:
+            from artifact import publish_artifact
+            artifact_url = publish_artifact()
+        # Launch every instance of a type in one call, then wait on all of them together
+        instance_ids = []
         for instance_config in instances_config:
-            setup_script = open(instance_config["setup_script"]).read()
-            for _ in range(n_instances_by_type):
-                create_instance(instance_config["type"], setup_script)
+            setup_script = render_user_data(instance_config["cluster"], artifact_url)
+            instance_ids += create_instances(instance_config["type"], setup_script, n_instances_by_type)
+        print(f"Launched {len(instance_ids)} instances, waiting for them to be running...")
+        wait_until_running(instance_ids)
         print("All instances are created and running.")
     else:
         raise Exception(f"Unexpected number of instances found: {len(instances)} ... Stoping script.")
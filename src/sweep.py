@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Parameter sweeps over the app's synthetic workload endpoints (app/work.py).
+For each value of the swept parameter (and each concurrency), runs the
+closed-loop benchmark and reports throughput, latency and transfer rate,
+plus the p50 of each cluster seen in the X-Backend header, so t2.large and
+t2.micro can be compared under the same work.
+
+    python src/sweep.py cpu                        # hash rounds: 1k, 10k, 100k
+    python src/sweep.py matmul --values 50 100 200
+    python src/sweep.py io -c 10 100               # sleep ms x concurrency grid
+    python src/sweep.py payload --cluster cluster2 # only through /cluster2/work
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+from urllib.parse import urlencode
+
+from benchmark import benchmark, load_base_url
+from histogram import LatencyHistogram
+from http_client import add_client_arguments, config_from_args
+
+SWEEPS = {
+    "cpu": {"path": "cpu", "param": "n", "values": [1_000, 10_000, 100_000], "fixed": {"kind": "hash"}},
+    "matmul": {"path": "cpu", "param": "n", "values": [25, 50, 100], "fixed": {"kind": "matmul"}},
+    "io": {"path": "io", "param": "ms", "values": [0, 10, 50, 200], "fixed": {}},
+    "payload": {"path": "payload", "param": "size", "values": [1 << 10, 1 << 16, 1 << 20, 1 << 23], "fixed": {}},
+}
+
+
+def sweep_url(base_url, sweep, value, cluster=None):
+    prefix = f"/{cluster}/work" if cluster else "/work"
+    query = urlencode({**sweep["fixed"], sweep["param"]: value})
+    return f"{base_url}{prefix}/{sweep['path']}?{query}"
+
+
+def cluster_p50s(stats):
+    """{cluster: p50 ms} merged over the instances of each cluster"""
+    clusters = {}
+    for backend, histogram in stats.backends.items():
+        cluster = backend.split("/", 1)[0]
+        clusters.setdefault(cluster, LatencyHistogram()).merge(histogram)
+    return {cluster: h.percentile(50) / 1000 for cluster, h in sorted(clusters.items())}
+
+
+async def run_sweep(base_url, sweep, values, concurrencies, num_requests, cluster=None, client_config=None):
+    rows = []
+    for value, concurrency in itertools.product(values, concurrencies):
+        url = sweep_url(base_url, sweep, value, cluster)
+        print(f"🚀 {sweep['param']}={value} c={concurrency}...", flush=True)
+        stats = await benchmark(url, num_requests, concurrency, client_config=client_config,
+                                progress=False, quiet=True)
+        report = stats.report()
+        rows.append({
+            sweep["param"]: value,
+            "concurrency": concurrency,
+            "throughput_rps": report["throughput_rps"],
+            "mb_per_s": report["bytes_received"] / report["elapsed_s"] / 1e6 if report["elapsed_s"] else 0.0,
+            "errors": report["errors"],
+            "latency_ms": report["latency_ms"],
+            "cluster_p50_ms": cluster_p50s(stats),
+        })
+    return rows
+
+
+def print_sweep(param, rows):
+    clusters = sorted({c for row in rows for c in row["cluster_p50_ms"]})
+    header = f"{param:>10} {'c':>5} {'req/s':>9} {'p50 ms':>9} {'p99 ms':>9} {'MB/s':>8} {'errors':>7}"
+    header += "".join(f" {c + ' p50':>14}" for c in clusters)
+    print("\n" + header)
+    for row in rows:
+        lat = row["latency_ms"]
+        line = (f"{row[param]:>10} {row['concurrency']:>5} {row['throughput_rps']:>9.1f} {lat['p50']:>9.2f} "
+                f"{lat['p99']:>9.2f} {row['mb_per_s']:>8.2f} {row['errors']:>7}")
+        line += "".join(f" {row['cluster_p50_ms'].get(c, float('nan')):>14.2f}" for c in clusters)
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sweep the app's CPU / IO / payload workload endpoints")
+    parser.add_argument("sweep", choices=SWEEPS)
+    parser.add_argument("--values", type=int, nargs="+", help="Values of the swept parameter")
+    parser.add_argument("--cluster", choices=["cluster1", "cluster2"],
+                        help="Send the work through /<cluster>/work (default: /work, both clusters)")
+    parser.add_argument("--url", help="Base URL (defaults to the ALB DNS in alb_info.json)")
+    parser.add_argument("-n", "--requests", type=int, default=200, help="Requests per point")
+    parser.add_argument("-c", "--concurrency", type=int, nargs="+", default=[20], help="Concurrencies to sweep")
+    parser.add_argument("-o", "--output", default="sweep_results.json", help="JSON results file")
+    add_client_arguments(parser)
+    args = parser.parse_args()
+
+    sweep = SWEEPS[args.sweep]
+    rows = asyncio.run(run_sweep(args.url or load_base_url(), sweep, args.values or sweep["values"],
+                                 args.concurrency, args.requests, args.cluster, config_from_args(args)))
+    print_sweep(sweep["param"], rows)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"sweep": args.sweep, "cluster": args.cluster, "rows": rows}, f, indent=2)
+        print(f"💾 Sweep results saved in {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+"""
+Lightweight tracing for the pipeline.
+- `span(name)` context managers time stages and waits; spans nest per
+  thread, so the trace shows what ran inside what.
+- Every call made through the shared boto3 clients becomes a span too,
+  via botocore before-call / after-call events: per-API latency, error
+  code and retry count (ResponseMetadata.RetryAttempts).
+- The trace is written as Chrome trace JSON (open in chrome://tracing or
+  Perfetto) or, for a .jsonl path, as one JSON span per line; summary()
+  aggregates wall time per stage and latency/retries per API.
+"""
+
+import contextlib
+import json
+import os
+import threading
+import time
+
+from aws_clients import register_client_hook
+
+TRACE_PATH = os.environ.get("TRACE_PATH", "pipeline_trace.json")
+
+
+class Tracer:
+    """Collects finished spans: {name, cat, ts, dur (µs), tid, parent, args}"""
+
+    def __init__(self):
+        self.spans = []
+        self.started_at = time.time()
+        self._origin = time.perf_counter_ns()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def _now_us(self):
+        return (time.perf_counter_ns() - self._origin) / 1000
+
+    def _stack(self):
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def record(self, name, cat, start_us, end_us, args=None):
+        stack = self._stack()
+        span = {
+            "name": name,
+            "cat": cat,
+            "ts": start_us,
+            "dur": end_us - start_us,
+            "tid": threading.get_ident(),
+            "parent": stack[-1] if stack else None,
+            "args": args or {},
+        }
+        with self._lock:
+            self.spans.append(span)
+        return span
+
+    @contextlib.contextmanager
+    def span(self, name, cat="pipeline", **args):
+        """Time the enclosed block; exceptions are recorded and re-raised"""
+        stack = self._stack()
+        start = self._now_us()
+        stack.append(name)
+        try:
+            yield args
+        except BaseException as e:
+            args["error"] = type(e).__name__
+            raise
+        finally:
+            stack.pop()
+            self.record(name, cat, start, self._now_us(), args)
+
+    # ---------------------- BOTOCORE ----------------------
+
+    def instrument(self, client, service):
+        """Turn every API call of a botocore client into an 'aws' span"""
+        def before_call(model, context, **kwargs):
+            context["trace_start_us"] = self._now_us()
+            context["trace_api"] = f"{service}.{model.name}"
+
+        def after_call(context, parsed=None, exception=None, **kwargs):
+            # after-call-error (connection failures) carries no model, hence trace_api
+            start = context.pop("trace_start_us", None)
+            if start is None:
+                return
+            metadata = (parsed or {}).get("ResponseMetadata", {})
+            args = {"retries": metadata.get("RetryAttempts", 0)}
+            error = (parsed or {}).get("Error", {}).get("Code") or (exception and type(exception).__name__)
+            if error:
+                args["error"] = error
+            self.record(context.pop("trace_api"), "aws", start, self._now_us(), args)
+
+        events = client.meta.events
+        events.register("before-call", before_call, unique_id=f"trace-before-{id(self)}")
+        events.register("after-call", after_call, unique_id=f"trace-after-{id(self)}")
+        events.register("after-call-error", after_call, unique_id=f"trace-error-{id(self)}")
+
+    def instrument_aws(self):
+        """Instrument every shared client, existing and future (see aws_clients)"""
+        register_client_hook(self.instrument)
+
+    # ---------------------- OUTPUT ----------------------
+
+    def write(self, path=TRACE_PATH):
+        """Chrome trace JSON, or JSON lines if the path ends in .jsonl"""
+        with self._lock:
+            spans = list(self.spans)
+        if path.endswith(".jsonl"):
+            with open(path, "w") as f:
+                for span in spans:
+                    f.write(json.dumps(span, default=str) + "\n")
+            return path
+
+        pid = os.getpid()
+        events = [
+            {"name": s["name"], "cat": s["cat"], "ph": "X", "ts": s["ts"], "dur": s["dur"],
+             "pid": pid, "tid": s["tid"], "args": s["args"]}
+            for s in spans
+        ]
+        with open(path, "w") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms",
+                       "otherData": {"started_at": self.started_at}}, f, default=str)
+        return path
+
+    def summary(self):
+        """{"stages": {name: seconds}, "aws": {api: {calls, total_s, p50_ms, max_ms, retries, errors}}}"""
+        with self._lock:
+            spans = list(self.spans)
+        stages = {s["name"]: s["dur"] / 1e6 for s in spans if s["cat"] == "stage"}
+
+        durations = {}
+        aws = {}
+        for s in spans:
+            if s["cat"] != "aws":
+                continue
+            entry = aws.setdefault(s["name"], {"calls": 0, "total_s": 0.0, "retries": 0, "errors": 0})
+            entry["calls"] += 1
+            entry["total_s"] += s["dur"] / 1e6
+            entry["retries"] += s["args"].get("retries", 0)
+            entry["errors"] += 1 if "error" in s["args"] else 0
+            durations.setdefault(s["name"], []).append(s["dur"] / 1000)
+        for name, values in durations.items():
+            values.sort()
+            aws[name]["p50_ms"] = values[(len(values) - 1) // 2]
+            aws[name]["max_ms"] = values[-1]
+        return {"stages": stages, "aws": aws}
+
+
+def print_summary(summary):
+    if summary["stages"]:
+        print("\n⏱️ Stage wall time")
+        for name, seconds in summary["stages"].items():
+            print(f"   {name:<20} {seconds:>9.2f} s")
+    if summary["aws"]:
+        print("☁️ AWS API calls")
+        print(f"   {'api':<40} {'calls':>6} {'total s':>8} {'p50 ms':>8} {'max ms':>8} {'retries':>8} {'errors':>7}")
+        for name, e in sorted(summary["aws"].items(), key=lambda item: -item[1]["total_s"]):
+            print(f"   {name:<40} {e['calls']:>6} {e['total_s']:>8.2f} {e['p50_ms']:>8.1f} "
+                  f"{e['max_ms']:>8.1f} {e['retries']:>8} {e['errors']:>7}")
+
+
+_tracer = None
+_tracer_lock = threading.Lock()
+
+
+def get_tracer():
+    """The process-wide Tracer"""
+    global _tracer
+    if _tracer is None:
+        with _tracer_lock:
+            if _tracer is None:
+                _tracer = Tracer()
+    return _tracer
+
+
+def span(name, cat="pipeline", **args):
+    """Span on the process-wide tracer"""
+    return get_tracer().span(name, cat, **args)
@@ -1,64 +1,171 @@
+import multiprocessing
+import numpy as np
 import pandas as pd
-import matplotlib.pyplot as plt
 import os
 import sys
+from concurrent.futures import ProcessPoolExecutor
+# Object-oriented Agg API only: no pyplot state machine, no GUI backend
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
 
 OUTPUT_DIR = "plots"
+VALUE_KEYS = ["Average", "Sum", "Maximum", "Minimum", "SampleCount"]
+MAX_POINTS_WITH_MARKERS = 200
+MARKERS = ['o', 's', '^', 'x', 'd']
+LINESTYLES = ['-', '--', ':', '-.']
 
-def plot_metrics_from_data(metrics_data):
-    """Generates plots directly from the metrics_data dictionary."""
-    
-    plot_data = []
-    for tg_name, tg_metrics in metrics_data.items():
-        for metric_name, datapoints in tg_metrics.items():
+# One figure per process, cleared and reused for every metric it renders
+_figure = None
+
+def series_columns(datapoints):
+    """
+    (timestamps, values) for one series, either from CloudWatch's columnar
+    {"Timestamps": [...], "Values": [...]} or from a list of datapoint dicts.
+    """
+    if isinstance(datapoints, dict):
+        return datapoints.get("Timestamps", []), datapoints.get("Values", [])
+    # Every datapoint of a series carries the same statistic key
+    value_key = next((k for k in VALUE_KEYS if k in datapoints[0]), None)
+    if value_key is None:
+        return [], []
+    timestamps = [dp["Timestamp"] for dp in datapoints]
+    values = [dp[value_key] for dp in datapoints]
+    return timestamps, values
+
+def metrics_to_frame(metrics_data):
+    """Build one long DataFrame (TargetGroup, Metric, Timestamp, Value) column by column."""
+    tg_names = sorted(metrics_data)
+    metric_names = sorted({m for tg_metrics in metrics_data.values() for m in tg_metrics})
+    metric_codes = {name: i for i, name in enumerate(metric_names)}
+
+    # Per series: category codes and length; the columns are repeated from them
+    tg_series, metric_series, lengths, timestamps, values = [], [], [], [], []
+    for tg_code, tg_name in enumerate(tg_names):
+        for metric_name, datapoints in metrics_data[tg_name].items():
             if not datapoints:
                 continue
-            for dp in datapoints:
-                value = next((dp[k] for k in ["Average", "Sum", "Maximum", "Minimum", "SampleCount"] if k in dp), None)
-                
-                if dp.get("Timestamp") and value is not None:
-                    plot_data.append({
-                        "TargetGroup": tg_name,
-                        "Metric": metric_name,
-                        "Timestamp": dp.get("Timestamp"),
-                        "Value": value
-                    })
-
-    if not plot_data:
+            ts, vals = series_columns(datapoints)
+            if not len(ts):
+                continue
+            tg_series.append(tg_code)
+            metric_series.append(metric_codes[metric_name])
+            lengths.append(len(ts))
+            timestamps.extend(ts)
+            values.append(np.asarray(vals, dtype=float))
+
+    if not values:
+        return pd.DataFrame(columns=["TargetGroup", "Metric", "Timestamp", "Value"])
+
+    df = pd.DataFrame({
+        "TargetGroup": pd.Categorical.from_codes(np.repeat(tg_series, lengths), tg_names),
+        "Metric": pd.Categorical.from_codes(np.repeat(metric_series, lengths), metric_names),
+        # One conversion for every series; naive UTC keeps a datetime64 column
+        "Timestamp": pd.to_datetime(timestamps, utc=True, cache=False).tz_localize(None),
+        "Value": np.concatenate(values),
+    })
+    df = df[df["Timestamp"].notna() & df["Value"].notna()]
+    return df.sort_values(["Metric", "TargetGroup", "Timestamp"], kind="stable")
+
+# ---------------------- DOWNSAMPLING ----------------------
+
+def downsample_lttb(timestamps, values, threshold):
+    """Largest-Triangle-Three-Buckets: keep `threshold` visually significant points."""
+    n = len(values)
+    if threshold >= n or threshold < 3:
+        return timestamps, values
+    x = timestamps.astype("int64").astype(float)
+    y = values
+    edges = np.linspace(1, n - 1, threshold - 1).astype(int)
+    selected = np.empty(threshold, dtype=int)
+    selected[0], selected[-1] = 0, n - 1
+    a = 0
+    for i in range(threshold - 2):
+        start, end = edges[i], max(edges[i + 1], edges[i] + 1)
+        next_start = end
+        next_end = edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[next_start:max(next_end, next_start + 1)].mean()
+        avg_y = y[next_start:max(next_end, next_start + 1)].mean()
+        areas = np.abs((x[a] - avg_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (avg_y - y[a]))
+        a = start + int(np.argmax(areas))
+        selected[i + 1] = a
+    return timestamps[selected], values[selected]
+
+def downsample_minmax(timestamps, values, threshold):
+    """Keep the min and max of each of threshold/2 buckets (preserves spikes)."""
+    n = len(values)
+    if threshold >= n or threshold < 2:
+        return timestamps, values
+    keep = [0, n - 1]
+    for bucket in np.array_split(np.arange(n), threshold // 2):
+        if len(bucket):
+            keep.append(bucket[np.argmin(values[bucket])])
+            keep.append(bucket[np.argmax(values[bucket])])
+    keep = np.unique(keep)
+    return timestamps[keep], values[keep]
+
+DOWNSAMPLERS = {"lttb": downsample_lttb, "minmax": downsample_minmax}
+
+# ---------------------- RENDERING ----------------------
+
+def render_metric(metric, series, output_dir=OUTPUT_DIR, fmt="png", downsample=None, max_points=2000):
+    """Render one metric (all its target groups) to output_dir/<metric>.<fmt>."""
+    global _figure
+    if _figure is None:
+        # Tight layout runs as part of the single draw in savefig
+        _figure = Figure(figsize=(12, 7), layout="tight")
+        FigureCanvasAgg(_figure)
+    fig = _figure
+    fig.clear()
+    ax = fig.add_subplot()
+
+    for i, (tg_name, timestamps, values) in enumerate(series):
+        if downsample:
+            timestamps, values = DOWNSAMPLERS[downsample](timestamps, values, max_points)
+        ax.plot(
+            timestamps,
+            values,
+            marker=MARKERS[i % len(MARKERS)] if len(values) <= MAX_POINTS_WITH_MARKERS else None,
+            linestyle=LINESTYLES[i % len(LINESTYLES)],
+            label=tg_name
+        )
+
+    ax.set_title(f'Metric: {metric}', fontsize=16)
+    ax.set_xlabel('Time', fontsize=12)
+    ax.set_ylabel('Value', fontsize=12)
+    ax.grid(True, which='both', linestyle='--', linewidth=0.5)
+    ax.legend()
+    fig.autofmt_xdate(rotation=45, ha="right")
+
+    output_path = os.path.join(output_dir, f"{metric}.{fmt}")
+    fig.savefig(output_path, format=fmt)
+    return output_path
+
+def plot_metrics_from_data(metrics_data, output_dir=OUTPUT_DIR, fmt="png", downsample="minmax",
+                           max_points=2000, workers=None):
+    """
+    Generates plots directly from the metrics_data dictionary, one metric per
+    process-pool worker. Series longer than max_points are reduced with
+    `downsample` ("minmax", "lttb" or None to plot every point).
+    """
+
+    df = metrics_to_frame(metrics_data)
+    if df.empty:
         print("⚠️ No data available to visualize.")
         return
 
-    df = pd.DataFrame(plot_data)
-    df['Timestamp'] = pd.to_datetime(df['Timestamp'])
-
-    os.makedirs(OUTPUT_DIR, exist_ok=True)
-    metrics = df['Metric'].unique()
-
-    markers = ['o', 's', '^', 'x', 'd']
-    linestyles = ['-', '--', ':', '-.']
-
-    for metric in metrics:
-        plt.figure(figsize=(12, 7))
-        metric_df = df[df['Metric'] == metric]
-        
-        for i, tg_name in enumerate(sorted(metric_df['TargetGroup'].unique())):
-            tg_df = metric_df[metric_df['TargetGroup'] == tg_name].sort_values('Timestamp')
-            plt.plot(
-                tg_df['Timestamp'],
-                tg_df['Value'],
-                marker=markers[i % len(markers)],
-                linestyle=linestyles[i % len(linestyles)],
-                label=tg_name
-            )
-
-        plt.title(f'Metric: {metric}', fontsize=16)
-        plt.xlabel('Time', fontsize=12)
-        plt.ylabel('Value', fontsize=12)
-        plt.grid(True, which='both', linestyle='--', linewidth=0.5)
-        plt.legend()
-        plt.xticks(rotation=45, ha="right")
-        plt.tight_layout()
-        
-        output_path = os.path.join(OUTPUT_DIR, f"{metric}.png")
-        plt.savefig(output_path)
-        plt.close()
+    os.makedirs(output_dir, exist_ok=True)
+
+    # Single grouping pass: one (metric, target group) series per group
+    series_by_metric = {}
+    for (metric, tg_name), tg_df in df.groupby(["Metric", "TargetGroup"], observed=True, sort=True):
+        series_by_metric.setdefault(metric, []).append(
+            (tg_name, tg_df["Timestamp"].to_numpy(), tg_df["Value"].to_numpy())
+        )
+
+    workers = min(workers or os.cpu_count() or 1, len(series_by_metric))
+    args = [(metric, series, output_dir, fmt, downsample, max_points) for metric, series in series_by_metric.items()]
+    if workers <= 1:
+        return [render_metric(*a) for a in args]
+    # spawn: the pipeline has boto3 and tracing threads whose locks a forked child would inherit
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+        return list(pool.map(render_metric, *zip(*args)))
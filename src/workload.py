@@ -0,0 +1,192 @@
+"""
+Mixed-traffic workloads for benchmark.py.
+A workload is a weighted mix of paths and a list of phases, each with a
+duration and a start/end request rate (linear ramp). All paths are loaded
+concurrently from one open-loop schedule, so /cluster1, /cluster2 and the
+ALB default rule (/) compete for the load balancer at the same time.
+Results are broken down per path and per phase.
+
+Spec format (JSON):
+
+    {
+      "paths": {"/": 1, "/cluster1": 2, "/cluster2": 2},
+      "phases": [
+        {"name": "ramp-up",   "duration": 30, "start_rps": 10,  "end_rps": 200},
+        {"name": "steady",    "duration": 60, "rps": 200},
+        {"name": "ramp-down", "duration": 30, "start_rps": 200, "end_rps": 10}
+      ]
+    }
+"""
+
+import asyncio
+import json
+import math
+import random
+from dataclasses import replace
+
+from benchmark import EndpointStats, RequestOptions, call_endpoint_http, expected_host_for, report_progress
+from http_client import ConnectionStats, create_session
+from load_engine import interleave, run_open_loop
+
+DEFAULT_WORKLOAD = {
+    "paths": {"/": 1, "/cluster1": 2, "/cluster2": 2},
+    "phases": [
+        {"name": "ramp-up", "duration": 30, "start_rps": 10, "end_rps": 200},
+        {"name": "steady", "duration": 60, "rps": 200},
+        {"name": "ramp-down", "duration": 30, "start_rps": 200, "end_rps": 10},
+    ],
+}
+
+
+def validate_workload(spec):
+    """Raise ValueError unless a spec has weighted paths and valid, uniquely named phases"""
+    paths = spec.get("paths")
+    if not isinstance(paths, dict) or not paths:
+        raise ValueError("Workload needs a non-empty 'paths' object of path -> weight")
+    if any(weight < 0 for weight in paths.values()) or sum(paths.values()) <= 0:
+        raise ValueError("Workload path weights must be non-negative, with a positive sum")
+
+    phases = spec.get("phases")
+    if not isinstance(phases, list) or not phases:
+        raise ValueError("Workload needs a non-empty 'phases' list")
+    names = set()
+    for i, phase in enumerate(phases):
+        name = phase.get("name")
+        if not name:
+            raise ValueError(f"Phase {i} has no name")
+        if name in names:
+            raise ValueError(f"Phase name '{name}' is used twice; phase results are keyed by name")
+        names.add(name)
+        if not phase.get("duration", 0) > 0:
+            raise ValueError(f"Phase '{name}' needs a positive duration")
+        if "rps" not in phase and not ("start_rps" in phase and "end_rps" in phase):
+            raise ValueError(f"Phase '{name}' needs 'rps' or both 'start_rps' and 'end_rps'")
+        if any(rate < 0 for rate in phase_rates(phase)):
+            raise ValueError(f"Phase '{name}' has a negative rate")
+    return spec
+
+
+def load_workload(path=None):
+    """Load and validate a workload spec from a JSON file, or return the default one"""
+    if path is None or path == "default":
+        return DEFAULT_WORKLOAD
+    with open(path) as f:
+        return validate_workload(json.load(f))
+
+
+def phase_rates(phase):
+    """(start_rps, end_rps) of a phase"""
+    if "rps" in phase:
+        return phase["rps"], phase["rps"]
+    return phase["start_rps"], phase["end_rps"]
+
+
+def phase_offsets(duration, start_rps, end_rps):
+    """
+    Send offsets within one phase for a rate ramping linearly from start_rps
+    to end_rps. The k-th request goes at the time t where the expected number
+    of requests sent so far, start_rps*t + slope*t^2/2, reaches k.
+    """
+    slope = (end_rps - start_rps) / duration
+    total = int((start_rps + end_rps) * duration / 2)
+    for k in range(total):
+        if abs(slope) < 1e-9:
+            yield k / start_rps
+        else:
+            yield (-start_rps + math.sqrt(start_rps ** 2 + 2 * slope * k)) / slope
+
+
+def workload_schedule(spec, seed=None):
+    """Yield (offset, path, phase_name) for every request of the workload"""
+    rng = random.Random(seed)
+    paths = list(spec["paths"])
+    weights = list(spec["paths"].values())
+    phase_start = 0.0
+    for phase in spec["phases"]:
+        start_rps, end_rps = phase_rates(phase)
+        for offset in phase_offsets(phase["duration"], start_rps, end_rps):
+            path = rng.choices(paths, weights)[0]
+            yield phase_start + offset, path, phase["name"]
+        phase_start += phase["duration"]
+
+
+def result_key(path, phase):
+    return f"{path} [{phase}]"
+
+
+def summarize_workload(spec, results):
+    """Add per-path totals ('<path> [all]') and an overall total to phase results"""
+    summary = dict(results)
+    total_duration = sum(phase["duration"] for phase in spec["phases"])
+    total = EndpointStats("total")
+    for path in spec["paths"]:
+        combined = EndpointStats(path)
+        for phase in spec["phases"]:
+            combined.merge_dict(results[result_key(path, phase["name"])].to_dict())
+        combined.elapsed = total_duration
+        summary[result_key(path, "all")] = combined
+        total.merge_dict(combined.to_dict())
+    summary["total"] = total
+    return summary
+
+
+async def run_workload(base_url, spec, client_config=None, options=None, max_in_flight=10000,
+                       seed=None, quiet=False, share=None):
+    """
+    Run a workload against base_url and return EndpointStats per (path, phase).
+    With share=(index, parts) only this generator's interleaved part of the
+    schedule is sent (see distributed.py).
+    """
+    options = options or RequestOptions()
+    path_options = {
+        path: replace(options, expected_host=expected_host_for(path)) for path in spec["paths"]
+    }
+    results = {}
+    for phase in spec["phases"]:
+        for path in spec["paths"]:
+            stats = EndpointStats(path)
+            stats.elapsed = phase["duration"]
+            results[result_key(path, phase["name"])] = stats
+
+    if not quiet:
+        duration = sum(phase["duration"] for phase in spec["phases"])
+        print(f"\n🚀 Running workload on {base_url}: {', '.join(spec['paths'])} over {duration}s...")
+    reporter = None
+    if not quiet and not options.verbose:
+        reporter = asyncio.create_task(report_progress(list(results.values())))
+
+    # One shared session for every path, so connection stats are global
+    connections = ConnectionStats()
+    try:
+        async with create_session(client_config, connections) as session:
+            async def request_fn(request_num, intended_start, path, phase_name):
+                stats = results[result_key(path, phase_name)]
+                await call_endpoint_http(session, request_num, base_url + path, stats,
+                                         intended_start, path_options[path])
+
+            schedule = workload_schedule(spec, seed)
+            if share:
+                schedule = interleave(schedule, *share)
+            await run_open_loop(request_fn, schedule, max_in_flight)
+    finally:
+        if reporter is not None:
+            reporter.cancel()
+
+    summary = summarize_workload(spec, results)
+    summary["total"].connections = connections
+    return summary
+
+
+def print_workload_report(results):
+    """One line per (path, phase) and per-path totals"""
+    print(f"\n{'path [phase]':<28}{'req':>8}{'req/s':>9}{'err%':>7}{'p50':>9}{'p99':>9}{'p99.9':>9}{'max':>9}")
+    for name, stats in results.items():
+        report = stats.report()
+        lat = report["latency_ms"]
+        print(
+            f"{name:<28}{report['requests']:>8}{report['throughput_rps']:>9.1f}"
+            f"{report['error_rate'] * 100:>7.2f}{lat['p50']:>9.2f}{lat['p99']:>9.2f}"
+            f"{lat['p99.9']:>9.2f}{lat['max']:>9.2f}"
+        )
+    conn = results["total"].connections.report()
+    print(f"🔌 Connections: {conn['new']} new, {conn['reused']} reused ({conn['reuse_ratio']:.1%})")
@@ -0,0 +1,49 @@
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SRC_DIR = os.path.join(ROOT, "src")
+APP_DIR = os.path.join(ROOT, "app")
+sys.path.insert(0, SRC_DIR)
+# After src/, so `main` stays the pipeline; app tests import the app's modules by name
+sys.path.append(APP_DIR)
+
+
+@pytest.fixture
+def aws(tmp_path, monkeypatch):
+    """moto-backed AWS with fresh shared clients and describe cache, run from tmp_path"""
+    moto = pytest.importorskip("moto")
+    monkeypatch.chdir(tmp_path)
+    for name, value in {"AWS_ACCESS_KEY_ID": "testing", "AWS_SECRET_ACCESS_KEY": "testing",
+                        "AWS_SESSION_TOKEN": "testing", "AWS_DEFAULT_REGION": "us-east-1"}.items():
+        monkeypatch.setenv(name, value)
+
+    import aws_cache
+    import aws_clients
+
+    def reset():
+        aws_clients.clear()
+        aws_clients._client_hooks.clear()
+        aws_cache._cache = None
+
+    reset()
+    aws_cache._cache = aws_cache.DescribeCache(str(tmp_path / ".aws_cache.json"))
+    with moto.mock_aws():
+        yield
+    reset()
+
+
+@pytest.fixture
+def vpc(aws):
+    """A VPC with two subnets in different AZs and a security group"""
+    from aws_clients import get_client
+    ec2 = get_client("ec2")
+    vpc_id = ec2.create_vpc(CidrBlock="10.0.0.0/16")["Vpc"]["VpcId"]
+    subnets = [
+        ec2.create_subnet(VpcId=vpc_id, CidrBlock=f"10.0.{i}.0/24", AvailabilityZone=az)["Subnet"]["SubnetId"]
+        for i, az in enumerate(["us-east-1a", "us-east-1b"])
+    ]
+    sg_id = ec2.create_security_group(GroupName="lab01-test", Description="test", VpcId=vpc_id)["GroupId"]
+    return {"vpc_id": vpc_id, "subnets": subnets, "sg_id": sg_id}
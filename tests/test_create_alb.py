@@ -0,0 +1,92 @@
+import json
+
+import boto3
+import pytest
+
+import create_alb
+from aws_clients import get_client
+
+
+@pytest.fixture
+def lab(vpc, monkeypatch):
+    """Running LAB01 instances of both types, and create_alb pointed at the test VPC"""
+    ec2 = get_client("ec2")
+    instances = {}
+    for instance_type in ("t2.large", "t2.micro"):
+        response = ec2.run_instances(
+            ImageId="ami-12c6146b", MinCount=1, MaxCount=1, InstanceType=instance_type,
+            SubnetId=vpc["subnets"][0],
+            TagSpecifications=[{"ResourceType": "instance", "Tags": [{"Key": "Lab", "Value": "LAB01"}]}],
+        )
+        instances[instance_type] = [i["InstanceId"] for i in response["Instances"]]
+    monkeypatch.setattr(create_alb, "VPC_ID", vpc["vpc_id"])
+    monkeypatch.setattr(create_alb, "SECURITY_GROUPS", [vpc["sg_id"]])
+    return instances
+
+
+def actions(changes):
+    return [(change.action, change.resource) for change in changes]
+
+
+def test_plan_on_empty_state_creates_everything(lab):
+    changes = create_alb.main(plan_only=True)
+    assert actions(changes) == [
+        ("create", "target group cluster1-tg"),
+        ("register", "targets in cluster1-tg"),
+        ("create", "target group cluster2-tg"),
+        ("register", "targets in cluster2-tg"),
+        ("create", "load balancer lab01-alb"),
+        ("create", "listener :80"),
+        ("create", "rule 10"),
+        ("create", "rule 20"),
+    ]
+    assert get_client("elbv2").describe_load_balancers()["LoadBalancers"] == []
+
+
+def test_apply_then_second_run_is_up_to_date(lab):
+    create_alb.main()
+
+    with open("alb_info.json") as f:
+        alb_info = json.load(f)
+    state = create_alb.get_actual_state()
+    assert state["alb"]["arn"] == alb_info["LoadBalancerArn"]
+    assert state["target_groups"]["cluster1-tg"]["targets"] == set(lab["t2.large"])
+    assert state["target_groups"]["cluster2-tg"]["targets"] == set(lab["t2.micro"])
+    assert {p: r["path"] for p, r in state["rules"].items()} == {10: "/cluster1*", 20: "/cluster2*"}
+
+    assert create_alb.main(plan_only=True) == []
+
+
+def test_wrong_health_check_path_is_updated(lab):
+    create_alb.main()
+    tg_arn = create_alb.get_actual_state()["target_groups"]["cluster1-tg"]["arn"]
+    get_client("elbv2").modify_target_group(TargetGroupArn=tg_arn, HealthCheckPath="/wrong")
+
+    assert actions(create_alb.main(plan_only=True)) == [("update", "target group cluster1-tg")]
+    create_alb.main()
+    assert create_alb.get_actual_state()["target_groups"]["cluster1-tg"]["health_path"] == "/cluster1"
+    assert create_alb.main(plan_only=True) == []
+
+
+def test_rule_pointing_at_stale_target_group_is_updated(lab, vpc):
+    create_alb.main()
+    elbv2 = get_client("elbv2")
+    stale_arn = elbv2.create_target_group(Name="stale-tg", Protocol="HTTP", Port=8000,
+                                          VpcId=vpc["vpc_id"], TargetType="instance")["TargetGroups"][0]["TargetGroupArn"]
+    rule_arn = create_alb.get_actual_state()["rules"][10]["arn"]
+    elbv2.modify_rule(RuleArn=rule_arn, Actions=[{"Type": "forward", "TargetGroupArn": stale_arn}])
+
+    assert actions(create_alb.main(plan_only=True)) == [("update", "rule 10")]
+    create_alb.main()
+    state = create_alb.get_actual_state()
+    assert state["rules"][10]["tg_arn"] == state["target_groups"]["cluster1-tg"]["arn"]
+    assert create_alb.main(plan_only=True) == []
+
+
+def test_plan_sees_changes_made_outside_the_process(lab):
+    create_alb.main()
+    # A client outside the shared registry, so the describe cache never sees the write
+    outside = boto3.client("elbv2", region_name="us-east-1")
+    outside.delete_rule(RuleArn=create_alb.get_actual_state()["rules"][20]["arn"])
+
+    assert actions(create_alb.main(plan_only=True)) == [("create", "rule 20")]
@@ -0,0 +1,60 @@
+import itertools
+import socket
+import threading
+import time
+
+import pytest
+
+import distributed
+from load_engine import constant_rate_schedule, interleave
+
+
+def test_open_loop_shares_interleave_into_the_requested_rate():
+    job = distributed.make_job({"x": "http://127.0.0.1:9/"}, num_requests=103, concurrency=8, rate=100)
+    shares = [distributed.worker_share(job, i, 4) for i in range(4)]
+    assert all(share["rate"] == 100 for share in shares)
+
+    offsets = sorted(itertools.chain.from_iterable(
+        interleave(constant_rate_schedule(share["rate"], share["num_requests"]), *share["share"])
+        for share in shares
+    ))
+    assert offsets == list(constant_rate_schedule(100, 103))
+
+
+def test_closed_loop_shares_split_requests_evenly():
+    job = distributed.make_job({"x": "http://127.0.0.1:9/"}, num_requests=10, concurrency=3)
+    shares = [distributed.worker_share(job, i, 4) for i in range(4)]
+    assert [share["num_requests"] for share in shares] == [3, 3, 2, 2]
+    assert "share" not in shares[0]
+
+
+def test_coordinator_fails_when_a_worker_never_sends_hello(monkeypatch):
+    monkeypatch.setattr(distributed, "ACCEPT_POLL", 0.05)
+    job = distributed.make_job({"x": "http://127.0.0.1:9/"}, 1, 1)
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+
+    silent = []
+
+    def connect_silently():
+        for _ in range(50):
+            try:
+                silent.append(socket.create_connection(("127.0.0.1", port)))
+                return
+            except OSError:
+                time.sleep(0.05)
+
+    threading.Thread(target=connect_silently, daemon=True).start()
+    start = time.monotonic()
+    with pytest.raises(TimeoutError, match="sent no hello"):
+        distributed.run_coordinator(job, 1, bind=("127.0.0.1", port), spawn_local=False, connect_timeout=1)
+    assert time.monotonic() - start < 5
+    for sock in silent:
+        sock.close()
+
+
+def test_coordinator_fails_when_workers_never_connect():
+    job = distributed.make_job({"x": "http://127.0.0.1:9/"}, 1, 1)
+    with pytest.raises(TimeoutError, match="0 of 2 workers"):
+        distributed.run_coordinator(job, 2, spawn_local=False, connect_timeout=0.5)
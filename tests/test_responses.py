@@ -0,0 +1,89 @@
+import asyncio
+import importlib.util
+import os
+
+import pytest
+
+pytest.importorskip("fastapi")
+
+from fastapi import FastAPI, Request
+
+from conftest import APP_DIR
+
+# By path: the `responses` package moto depends on shadows app/responses.py
+spec = importlib.util.spec_from_file_location("app_responses", os.path.join(APP_DIR, "responses.py"))
+app_responses = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(app_responses)
+StaticPayload = app_responses.StaticPayload
+
+PAYLOAD = {"status": "ok", "message": "hello"}
+
+
+def get(app, path="/", query=b"", headers=()):
+    """(status, headers dict, body) of one GET sent straight to the ASGI app"""
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": path, "raw_path": path.encode(), "query_string": query,
+        "root_path": "", "headers": [(b"host", b"test"), *headers],
+        "client": ("127.0.0.1", 1), "server": ("127.0.0.1", 80),
+    }
+    messages = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        messages.append(message)
+
+    asyncio.run(app(scope, receive, send))
+    start, body = messages[0], b"".join(m.get("body", b"") for m in messages[1:])
+    header_list = [(k.decode(), v.decode()) for k, v in start["headers"]]
+    return start["status"], header_list, body
+
+
+@pytest.fixture
+def served():
+    app = FastAPI()
+    payload = StaticPayload(PAYLOAD, extra_headers={"X-Backend": "cluster1/i-123/1"})
+
+    @app.get("/")
+    async def root(request: Request):
+        response = payload.respond(request)
+        response.headers["x-request"] = request.query_params.get("id", "")
+        return response
+
+    return app, payload
+
+
+def test_ok_response_headers(served):
+    app, payload = served
+    status, headers, body = get(app)
+    headers = dict(headers)
+
+    assert status == 200
+    assert body == payload.body
+    assert headers["content-type"] == "application/json"
+    assert headers["content-length"] == str(len(payload.body))
+    assert headers["etag"] == payload.etag
+    assert headers["x-backend"] == "cluster1/i-123/1"
+
+
+def test_not_modified_has_no_body_headers(served):
+    app, payload = served
+    status, headers, body = get(app, headers=[(b"if-none-match", f"W/{payload.etag}".encode())])
+    headers = dict(headers)
+
+    assert status == 304
+    assert body == b""
+    assert "content-type" not in headers
+    assert headers["etag"] == payload.etag
+
+
+def test_header_changes_stay_on_one_response(served):
+    app, payload = served
+    _, first, _ = get(app, query=b"id=1")
+    _, second, _ = get(app, query=b"id=2")
+
+    assert [v for k, v in first if k == "x-request"] == ["1"]
+    assert [v for k, v in second if k == "x-request"] == ["2"]
+    assert "x-request" not in payload.ok.headers
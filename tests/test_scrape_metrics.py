@@ -0,0 +1,23 @@
+import pytest
+
+import setup
+from scrape_metrics import check_instance_urls, instance_metrics_urls
+
+
+def test_alb_urls_are_rejected():
+    with pytest.raises(ValueError, match="load balancer"):
+        check_instance_urls(["http://lab01-alb-123.us-east-1.elb.amazonaws.com/metrics"])
+    with pytest.raises(ValueError):
+        check_instance_urls([])
+    assert check_instance_urls(["http://10.0.0.1:8000/metrics"]) == ["http://10.0.0.1:8000/metrics"]
+
+
+def test_default_urls_are_every_running_instance(vpc, monkeypatch):
+    monkeypatch.setattr(setup, "VPC_ID", vpc["vpc_id"])
+    monkeypatch.setenv("AMI_ID", "ami-12c6146b")
+    setup.create_security_group()
+    ids = setup.create_instances("t2.micro", "", count=3)
+
+    urls = instance_metrics_urls()
+    assert len(urls) == len(ids)
+    assert all(url.startswith("http://") and url.endswith(":8000/metrics") for url in urls)
@@ -0,0 +1,38 @@
+import json
+import os
+import subprocess
+import sys
+
+from server_metrics import WorkerMetrics, worker_count
+
+
+def dead_pid():
+    process = subprocess.Popen([sys.executable, "-c", "pass"])
+    process.wait()
+    return process.pid
+
+
+def test_aggregate_skips_snapshots_of_dead_workers(tmp_path):
+    stale = tmp_path / f"worker-{dead_pid()}.json"
+    stale.write_text(json.dumps({"/": {"statuses": {"200": 1000}, "buckets": [1000] + [0] * 60,
+                                       "sum": 1.0, "count": 1000}}))
+    metrics = WorkerMetrics(str(tmp_path))
+    metrics.record("/", "200", 0.001)
+
+    totals = metrics.aggregate()
+    assert totals["/"]["count"] == 1
+    assert totals["/"]["statuses"] == {"200": 1}
+    assert worker_count(str(tmp_path)) == 1
+
+
+def test_aggregate_sums_live_workers(tmp_path):
+    other = WorkerMetrics(str(tmp_path))
+    other.path = os.path.join(str(tmp_path), f"worker-{os.getppid()}.json")
+    other.record("/work/cpu", "200", 0.01)
+    other.write_snapshot()
+    metrics = WorkerMetrics(str(tmp_path))
+    metrics.record("/work/cpu", "422", 0.001)
+
+    totals = metrics.aggregate()
+    assert totals["/work/cpu"]["statuses"] == {"200": 1, "422": 1}
+    assert worker_count(str(tmp_path)) == 2
@@ -0,0 +1,56 @@
+import pytest
+
+import setup
+from aws_clients import get_client
+
+
+@pytest.fixture
+def provision(vpc, monkeypatch):
+    """setup.py pointed at the test VPC, with a fixed AMI"""
+    monkeypatch.setattr(setup, "VPC_ID", vpc["vpc_id"])
+    monkeypatch.setenv("AMI_ID", "ami-12c6146b")
+    return vpc
+
+
+def lab_instances():
+    reservations = get_client("ec2").describe_instances(
+        Filters=[{"Name": "tag:Lab", "Values": ["LAB01"]}])["Reservations"]
+    return [i for r in reservations for i in r["Instances"]]
+
+
+def test_create_security_group_is_idempotent(provision):
+    setup.create_security_group()
+    setup.create_security_group()
+
+    groups = get_client("ec2").describe_security_groups(
+        Filters=[{"Name": "group-name", "Values": [setup.sg_name]}])["SecurityGroups"]
+    assert len(groups) == 1
+    assert groups[0]["VpcId"] == provision["vpc_id"]
+    assert {p["FromPort"] for p in groups[0]["IpPermissions"]} == {22, 80, 8000}
+
+
+def test_setup_launches_both_clusters_with_the_group_id(provision):
+    setup.create_security_group()
+    setup.setup(artifact_url="https://example.com/server.tar.gz")
+
+    instances = lab_instances()
+    assert sorted(i["InstanceType"] for i in instances) == ["t2.large"] * 4 + ["t2.micro"] * 4
+    group_id = setup.security_group_id(setup.sg_name)
+    assert all([g["GroupId"] for g in i["SecurityGroups"]] == [group_id] for i in instances)
+    assert all(i["State"]["Name"] == "running" for i in instances)
+
+
+def test_setup_restarts_stopped_instances(provision):
+    setup.create_security_group()
+    setup.setup(artifact_url="https://example.com/server.tar.gz")
+    stopped = [i["InstanceId"] for i in lab_instances()][:2]
+    get_client("ec2").stop_instances(InstanceIds=stopped)
+
+    setup.setup(artifact_url="https://example.com/server.tar.gz")
+    assert {i["State"]["Name"] for i in lab_instances()} == {"running"}
+
+
+def test_render_user_data_fills_the_template():
+    script = setup.render_user_data("cluster2", "https://example.com/a.tar.gz")
+    assert "__CLUSTER_NAME__" not in script and "__ARTIFACT_URL__" not in script
+    assert "cluster2" in script and "https://example.com/a.tar.gz" in script
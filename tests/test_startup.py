@@ -0,0 +1,31 @@
+import json
+import subprocess
+import sys
+
+from bench_startup import HEAVY_MODULES, MAIN, heavy_imports, import_times
+
+
+def test_help_imports_no_heavy_module_at_any_depth():
+    assert heavy_imports(import_times(["--help"], top_level=False)) == []
+
+
+def test_sys_modules_after_importing_main_has_no_heavy_module():
+    script = (
+        "import json, runpy, sys\n"
+        f"sys.argv = [{MAIN!r}, '--help']\n"
+        f"sys.path.insert(0, {MAIN.rsplit('/', 1)[0]!r})\n"
+        "try:\n"
+        f"    runpy.run_path({MAIN!r}, run_name='__main__')\n"
+        "except SystemExit:\n"
+        "    pass\n"
+        "print(json.dumps(sorted(sys.modules)))\n"
+    )
+    result = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True, check=True)
+    modules = json.loads(result.stdout.splitlines()[-1])
+    assert heavy_imports(modules) == []
+
+
+def test_heavy_imports_catches_nested_modules():
+    assert heavy_imports(["json", "botocore.session"]) == ["botocore"]
+    assert heavy_imports(["pandasx"]) == []
+    assert set(heavy_imports(HEAVY_MODULES)) == set(HEAVY_MODULES)
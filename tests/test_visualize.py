@@ -0,0 +1,24 @@
+import os
+
+import pytest
+
+pytest.importorskip("matplotlib")
+
+from visualize import plot_metrics_from_data
+
+
+def series(n):
+    return {"Timestamps": [f"2024-01-01T00:{i // 60:02d}:{i % 60:02d}Z" for i in range(n)],
+            "Values": [float(i) for i in range(n)]}
+
+
+def test_plots_in_spawned_workers(tmp_path):
+    metrics_data = {
+        "cluster1-tg": {"RequestCount": series(120), "TargetResponseTime": series(120)},
+        "cluster2-tg": {"RequestCount": series(60), "TargetResponseTime": series(60)},
+    }
+
+    paths = plot_metrics_from_data(metrics_data, output_dir=str(tmp_path), workers=2)
+
+    assert len(paths) == 2
+    assert all(os.path.getsize(path) > 0 for path in paths)
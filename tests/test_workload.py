@@ -0,0 +1,42 @@
+import json
+
+import pytest
+
+from workload import DEFAULT_WORKLOAD, load_workload, validate_workload, workload_schedule
+
+
+def spec(*phases, paths=None):
+    return {"paths": paths or {"/": 1}, "phases": list(phases)}
+
+
+def test_default_workload_is_valid():
+    assert validate_workload(DEFAULT_WORKLOAD) is DEFAULT_WORKLOAD
+
+
+@pytest.mark.parametrize("bad, message", [
+    (spec({"name": "a", "duration": 0, "rps": 10}), "positive duration"),
+    (spec({"name": "a", "duration": -5, "rps": 10}), "positive duration"),
+    (spec({"name": "a", "duration": 10, "start_rps": -1, "end_rps": 5}), "negative rate"),
+    (spec({"name": "a", "duration": 10, "rps": 1}, {"name": "a", "duration": 10, "rps": 2}), "used twice"),
+    (spec({"name": "a", "duration": 10, "start_rps": 1}), "'rps' or both"),
+    (spec({"duration": 10, "rps": 1}), "no name"),
+    (spec(), "non-empty 'phases'"),
+    (spec({"name": "a", "duration": 10, "rps": 1}, paths={"/": 0}), "positive sum"),
+])
+def test_invalid_specs_are_rejected(bad, message):
+    with pytest.raises(ValueError, match=message):
+        validate_workload(bad)
+
+
+def test_load_workload_validates_the_file(tmp_path):
+    path = tmp_path / "workload.json"
+    path.write_text(json.dumps(spec({"name": "a", "duration": 0, "rps": 10})))
+    with pytest.raises(ValueError, match="positive duration"):
+        load_workload(str(path))
+
+
+def test_zero_rate_phase_sends_nothing():
+    schedule = list(workload_schedule(spec({"name": "idle", "duration": 5, "rps": 0},
+                                           {"name": "busy", "duration": 1, "rps": 10})))
+    assert [phase for _, _, phase in schedule] == ["busy"] * 10
+    assert all(5 <= offset < 6 for offset, _, _ in schedule)
@@ -1,22 +0,0 @@
-#!/bin/bash
-set -e
-# ===== Base packages =====
-yum update -y
-yum install -y python3 python3-pip git
-
-# ===== 2) Clone repository =====
-cd /home/ec2-user
-if [ ! -d app ]; then
-  git clone https://github.com/miguelxsm/Advanced-Concepts-Of-Cloud-Computing.git app
-fi
-
-# ===== Dependencies =====
-pip3 install -r app/requirements.txt
-
-# ===== 4) Defining Cluster =====
-echo 'export CLUSTER_NAME=cluster2' > /etc/profile.d/cluster.sh # explain in the report how this helps
-export CLUSTER_NAME=cluster1
-
-# ===== 5) Deploy =====
-cd /home/ec2-user/app/app
-nohup python3 -m uvicorn main:app --host 0.0.0.0 --port 8000 >/home/ec2-user/app.log 2>&1 &
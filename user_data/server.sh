@@ -0,0 +1,27 @@
+#!/bin/bash
+set -e
+# Boot from the prebaked artifact built by src/artifact.py: no yum, git or pip.
+# The cluster name and artifact URL placeholders are filled in by src/setup.py.
+
+# ===== 1) Defining Cluster =====
+echo 'export CLUSTER_NAME=__CLUSTER_NAME__' > /etc/profile.d/cluster.sh
+export CLUSTER_NAME=__CLUSTER_NAME__
+
+# ===== 2) Fetch and unpack the artifact =====
+mkdir -p /opt/server
+cd /opt/server
+curl -fsS --retry 5 --retry-delay 2 -o server.tar.gz "__ARTIFACT_URL__"
+tar xzf server.tar.gz
+rm server.tar.gz
+
+# The wheels in site/ only load on the Python they were built for
+WANTED=$(python3 -c 'import json; print(json.load(open("manifest.json"))["python_version"])')
+HAVE=$(python3 -c 'import sys; print("%d.%d" % sys.version_info[:2])')
+if [ "$WANTED" != "$HAVE" ]; then
+  echo "Artifact built for Python $WANTED, instance has $HAVE" >/home/ec2-user/app.log
+  exit 1
+fi
+
+# ===== 3) Deploy =====
+export PYTHONPATH=/opt/server/site
+nohup python3 app/serve.py --host 0.0.0.0 --port 8000 >/home/ec2-user/app.log 2>&1 &